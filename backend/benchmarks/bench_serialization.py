@@ -0,0 +1,68 @@
+"""
+Benchmark: default vs fast JSON serialization of /logs/range/.
+
+Seeds a temporary SQLite database with one user and N consecutive days of
+logs, then times GET /logs/range/ over the whole history with
+FAST_JSON_RESPONSES off and on.
+
+Run: python benchmarks/bench_serialization.py [--rows 10000] [--repeat 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_db_path = os.path.join(tempfile.mkdtemp(prefix="salah_bench_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from config import settings  # noqa: E402
+from main import app  # noqa: E402
+from utils.firebase_auth import verify_firebase_token  # noqa: E402
+from benchmarks.datagen import generate  # noqa: E402
+
+END = date(2026, 1, 1)
+
+
+def time_requests(client: TestClient, url: str, repeat: int) -> list[float]:
+    client.get(url)  # warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    generate(
+        os.environ["DATABASE_URL"], users=1, days=args.rows, end=END,
+        google_ids=(verify_firebase_token("")["uid"],), every_day=True,
+    )
+    url = f"/logs/range/?start={END - timedelta(days=args.rows)}&end={END}"
+    results = {}
+    with TestClient(app) as client:
+        assert len(client.get(url).json()) == args.rows
+        for fast in (False, True):
+            settings.FAST_JSON_RESPONSES = fast
+            results[fast] = statistics.median(time_requests(client, url, args.repeat))
+
+    print(f"GET /logs/range/ with {args.rows} rows (median of {args.repeat}):")
+    print(f"  default:  {results[False] * 1000:8.1f} ms")
+    print(f"  fast:     {results[True] * 1000:8.1f} ms")
+    print(f"  speedup:  {results[False] / results[True]:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
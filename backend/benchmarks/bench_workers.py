@@ -0,0 +1,150 @@
+"""
+Benchmark: API throughput with 1..N uvicorn worker processes.
+
+Generates a SQLite database (USERS x YEARS of synthetic logs, see datagen.py),
+then for each worker count starts ``serve.py`` on it and drives it over HTTP
+for a fixed time with CONCURRENCY clients, as the mock-auth user. Each client
+loops over a mix of GET /logs/range/ (one year), GET /performance/ and, with
+probability --write-ratio, POST /logs/. Requests per second and latency
+percentiles are reported per worker count.
+
+The load generator runs on the same machine and takes CPU from the workers;
+on small machines pin it elsewhere or treat the numbers as a lower bound.
+
+Run: python benchmarks/bench_workers.py [--workers 1,2,4] [--duration 15]
+                                        [--concurrency 32] [--write-ratio 0.2]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx  # noqa: E402
+from utils.firebase_auth import verify_firebase_token  # noqa: E402
+from utils.scoring import PRAYERS  # noqa: E402
+from benchmarks.datagen import generate  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+END = date(2026, 1, 1)
+PORT = 8765
+
+
+def start_server(db_path: str, workers: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        FIREBASE_CREDENTIALS_PATH="",
+        SLOW_REQUEST_MS="1000000",
+    )
+    return subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(PORT),
+         "--workers", str(workers)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready")
+
+
+async def drive(duration: float, concurrency: int, write_ratio: float, days: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=30
+    ) as client:
+        await wait_until_ready(client)
+        year_ago = END - timedelta(days=365)
+        latencies: list[float] = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def worker(seed: int) -> None:
+            nonlocal errors
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                roll = rng.random()
+                start = time.perf_counter()
+                try:
+                    if roll < write_ratio:
+                        day = END - timedelta(days=rng.randrange(days))
+                        log = {f"{p}_fardh": rng.random() < 0.9 for p in PRAYERS}
+                        log["date"] = day.isoformat()
+                        response = await client.post("/logs/", json=log)
+                    elif roll < write_ratio + (1 - write_ratio) / 2:
+                        response = await client.get(f"/logs/range/?start={year_ago}&end={END}")
+                    else:
+                        response = await client.get(f"/performance/?start={year_ago}&end={END}")
+                    failed = response.status_code >= 400
+                except httpx.TransportError:
+                    # uvicorn closes the connection after a 500; count it, keep going
+                    failed = True
+                latencies.append(time.perf_counter() - start)
+                errors += failed
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput across worker counts.")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per worker count")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    days = int(args.years * 365.25)
+    with tempfile.TemporaryDirectory(prefix="salah_bench_") as workdir:
+        db_path = os.path.join(workdir, "workers.db")
+        uid = verify_firebase_token("")["uid"]
+        generate(f"sqlite:///{db_path}", args.users, days, end=END, google_ids=(uid,))
+
+        print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'errors':>8}")
+        baseline = None
+        for workers in (int(n) for n in args.workers.split(",")):
+            server = start_server(db_path, workers)
+            try:
+                result = asyncio.run(
+                    drive(args.duration, args.concurrency, args.write_ratio, days)
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            baseline = baseline or result["rps"]
+            print(
+                f"{workers:>8} {result['rps']:>10.1f} {result['p50_ms']:>10.1f} "
+                f"{result['p95_ms']:>10.1f} {result['errors']:>8}"
+                f"   (x{result['rps'] / baseline:.2f})"
+            )
+
+
+if __name__ == "__main__":
+    main()
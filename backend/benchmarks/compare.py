@@ -0,0 +1,63 @@
+"""
+Compare a benchmark report against a baseline report.
+
+A benchmark regresses when its median is more than ``threshold`` slower than
+the baseline's. Exits non-zero if anything regressed, so it can gate a deploy.
+
+Run: python benchmarks/compare.py baseline.json report.json [--threshold 0.25]
+"""
+import argparse
+import json
+import sys
+
+
+def compare(baseline: dict, report: dict, threshold: float) -> list[dict]:
+    """Pair up benchmarks present in both reports and flag regressions."""
+    rows = []
+    for group, benches in report["results"].items():
+        for name, stats in benches.items():
+            base = baseline["results"].get(group, {}).get(name)
+            if base is None:
+                continue
+            ratio = stats["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+            rows.append({
+                "group": group,
+                "name": name,
+                "baseline_ms": base["median_ms"],
+                "current_ms": stats["median_ms"],
+                "ratio": ratio,
+                "regressed": ratio > 1 + threshold,
+            })
+    return rows
+
+
+def print_comparison(rows: list[dict]) -> None:
+    for row in rows:
+        flag = "REGRESSED" if row["regressed"] else ""
+        print(
+            f"  {row['group']:>10} {row['name']:<36} "
+            f"{row['baseline_ms']:>10.2f} -> {row['current_ms']:>10.2f} ms "
+            f"({row['ratio']:.2f}x) {flag}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a benchmark report to a baseline.")
+    parser.add_argument("baseline")
+    parser.add_argument("report")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.report) as f:
+        report = json.load(f)
+
+    rows = compare(baseline, report, args.threshold)
+    print_comparison(rows)
+    if any(row["regressed"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
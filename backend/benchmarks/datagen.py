@@ -0,0 +1,126 @@
+"""
+Synthetic data generator for the backend benchmarks.
+
+Writes N users x D days of prayer logs into a SQLite (or any DATABASE_URL)
+database. Each user gets a consistency level, so the population mixes
+near-perfect users with irregular ones: fajr is missed more often than the
+other fardh, sunnah is only logged for prayed fardh (as the API enforces),
+some days are not logged at all, and monthly rollups are built to match.
+
+Run standalone: python benchmarks/datagen.py out.db --users 100 --years 3
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine  # noqa: E402
+from database import Base  # noqa: E402
+from models import MonthlyRollup, PrayerLog, User, generate_uuid  # noqa: E402
+from utils.rollups import rebuild_statement  # noqa: E402
+from utils.scoring import PRAYERS, compute_scores_from_logs  # noqa: E402
+
+# Relative chance of praying each fardh, scaled by the user's consistency
+FARDH_PROPENSITY = {"fajr": 0.80, "dhuhr": 0.95, "asr": 0.93, "maghrib": 0.98, "isha": 0.95}
+# Typical sunnah rakats when the user prays them
+SUNNAH_RAKATS = {"fajr": 2, "dhuhr": 6, "asr": 4, "maghrib": 2, "isha": 4}
+
+INSERT_CHUNK = 5000
+
+
+def _user_day(rng: random.Random, consistency: float) -> dict:
+    log = {}
+    for prayer in PRAYERS:
+        prayed = rng.random() < FARDH_PROPENSITY[prayer] * consistency
+        log[f"{prayer}_fardh"] = prayed
+        sunnah = prayed and rng.random() < consistency * 0.6
+        log[f"{prayer}_sunnah"] = SUNNAH_RAKATS[prayer] if sunnah else 0
+        log[f"{prayer}_nafl"] = 2 if prayed and rng.random() < 0.05 else 0
+    log["isha_witr"] = 3 if log["isha_fardh"] and rng.random() < consistency * 0.8 else 0
+    return log
+
+
+def generate(
+    url: str,
+    users: int,
+    days: int,
+    end: date = date(2026, 1, 1),
+    google_ids: tuple[str, ...] = (),
+    seed: int = 0,
+    every_day: bool = False,
+) -> None:
+    """Create the schema at ``url`` and fill it with synthetic users and logs.
+
+    ``google_ids`` names the first users (e.g. the mock-auth user the
+    benchmarks request as); the rest get generated ids. With ``every_day``
+    no day is left unlogged, so each user has exactly ``days`` logs.
+    """
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    start = end - timedelta(days=days)
+
+    with engine.begin() as conn:
+        user_rows = [
+            {
+                "id": generate_uuid(),
+                "google_id": google_ids[i] if i < len(google_ids) else f"bench_{i}",
+                "email": f"user{i}@salahtracker.test",
+                "created_at": now,
+                "change_seq": 1,
+            }
+            for i in range(users)
+        ]
+        conn.execute(User.__table__.insert(), user_rows)
+
+        batch = []
+        for user in user_rows:
+            consistency = rng.betavariate(5, 1.5)
+            logging_rate = 1.0 if every_day else 0.6 + 0.4 * consistency
+            for offset in range(days):
+                if rng.random() > logging_rate:
+                    continue
+                log = _user_day(rng, consistency)
+                log.update(
+                    id=generate_uuid(), user_id=user["id"],
+                    date=start + timedelta(days=offset),
+                    change_seq=1, created_at=now, updated_at=now,
+                )
+                batch.append(log)
+                if len(batch) >= INSERT_CHUNK:
+                    _insert_logs(conn, batch)
+                    batch = []
+        if batch:
+            _insert_logs(conn, batch)
+
+        conn.execute(MonthlyRollup.__table__.delete())
+        conn.execute(rebuild_statement(engine.dialect.name))
+    engine.dispose()
+
+
+def _insert_logs(conn, logs: list[dict]) -> None:
+    for log, score in zip(logs, compute_scores_from_logs(logs)):
+        log["daily_score"] = score
+    conn.execute(PrayerLog.__table__.insert(), logs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Salah Tracker database.")
+    parser.add_argument("path", help="SQLite file to create")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        sys.exit(f"{args.path} already exists")
+    generate(f"sqlite:///{args.path}", args.users, int(args.years * 365.25), seed=args.seed)
+    print(f"Generated {args.users} users x {args.years} years into {args.path}")
+
+
+if __name__ == "__main__":
+    main()
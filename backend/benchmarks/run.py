@@ -0,0 +1,235 @@
+"""
+Backend benchmark suite.
+
+For each data size (USERS x YEARS of synthetic logs, see datagen.py) this
+builds a SQLite database and times the hot paths in-process: the scorer,
+_upsert_log, and the /logs/sync, /logs/range/ and /performance/ endpoints
+(through the ASGI app, as the mock-auth user). Concurrent POST /logs/ bursts
+are timed with and without the group-commit buffer. Results go to a JSON
+report; compare it against a stored baseline with compare.py.
+
+Run: python benchmarks/run.py [--sizes 10x1,100x3] [--repeat 20]
+                              [--output report.json] [--baseline baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx  # noqa: E402
+import sqlalchemy  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker  # noqa: E402
+from database import (  # noqa: E402
+    create_api_engine, get_db, get_read_db, get_read_session_factory, get_session_factory,
+)
+from config import settings  # noqa: E402
+from main import app  # noqa: E402
+from models import User  # noqa: E402
+from routers.prayer_logs import _upsert_log  # noqa: E402
+from schemas import PrayerLogCreate  # noqa: E402
+from utils.firebase_auth import user_cache, verify_firebase_token  # noqa: E402
+from utils.scoring import (  # noqa: E402
+    PRAYERS, RAKAT_FIELDS, compute_daily_score, compute_daily_scores, fardh_mask,
+)
+from benchmarks.datagen import generate  # noqa: E402
+from benchmarks.compare import compare, print_comparison  # noqa: E402
+
+DEFAULT_SIZES = "10x1,100x3,300x5"
+END = date(2026, 1, 1)
+SCORING_BATCH = 10_000
+SYNC_BATCH_DAYS = 60
+# Concurrent POST /logs/ requests per burst, and the group-commit window
+CONCURRENT_POSTS = 50
+COALESCE_MS = 5
+
+
+def _summary(timings: list[float]) -> dict:
+    timings = sorted(timings)
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+        "repeat": len(timings),
+    }
+
+
+async def _time(fn, repeat: int) -> dict:
+    await fn()  # warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    return _summary(timings)
+
+
+def bench_scoring(repeat: int) -> dict:
+    rng = random.Random(0)
+    logs = []
+    for _ in range(SCORING_BATCH):
+        log = {f"{p}_fardh": rng.random() < 0.9 for p in PRAYERS}
+        log.update({field: rng.choice([0, 2, 4]) for field in RAKAT_FIELDS})
+        logs.append(log)
+    masks = [fardh_mask(log) for log in logs]
+    rakats = [[log[field] for field in RAKAT_FIELDS] for log in logs]
+
+    def run(fn) -> dict:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return _summary(timings)
+
+    return {
+        f"compute_daily_score_x{SCORING_BATCH}": run(
+            lambda: [compute_daily_score(**log) for log in logs]
+        ),
+        f"compute_daily_scores_x{SCORING_BATCH}": run(
+            lambda: compute_daily_scores(masks, rakats)
+        ),
+    }
+
+
+async def bench_size(users: int, years: float, repeat: int, workdir: str) -> dict:
+    days = int(years * 365.25)
+    path = os.path.join(workdir, f"{users}x{years}.db")
+    uid = verify_firebase_token("")["uid"]
+    generate(f"sqlite:///{path}", users, days, end=END, google_ids=(uid,))
+
+    # Same engine setup as the API: SQLite tuning profile and a query-only read pool
+    engine = create_api_engine(f"sqlite+aiosqlite:///{path}")
+    read_engine = create_api_engine(f"sqlite+aiosqlite:///{path}", read_only=True)
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    read_sessions = async_sessionmaker(read_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with sessions() as db:
+            yield db
+
+    async def override_get_read_db():
+        async with read_sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    app.dependency_overrides[get_session_factory] = lambda: sessions
+    app.dependency_overrides[get_read_session_factory] = lambda: read_sessions
+    user_cache.clear()
+
+    rng = random.Random(1)
+    first_day = END - timedelta(days=days)
+    year_ago = END - timedelta(days=365)
+
+    def random_log(day: date) -> PrayerLogCreate:
+        return PrayerLogCreate(
+            date=day, **{f"{p}_fardh": rng.random() < 0.9 for p in PRAYERS}, fajr_sunnah=2
+        )
+
+    async def upsert_log():
+        async with sessions() as db:
+            user = await db.scalar(select(User).where(User.google_id == uid))
+            await _upsert_log(db, user, random_log(END - timedelta(days=rng.randrange(days))))
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def get(url):
+            response = await client.get(url)
+            assert response.status_code == 200, response.text
+
+        async def batch_sync():
+            # A recent offline backlog: mostly updates of already-logged days
+            logs = [
+                random_log(END - timedelta(days=i)).model_dump(mode="json")
+                for i in range(SYNC_BATCH_DAYS)
+            ]
+            response = await client.post("/logs/sync", json={"logs": logs})
+            assert response.status_code == 200, response.text
+
+        async def concurrent_posts():
+            responses = await asyncio.gather(*(
+                client.post("/logs/", json=random_log(END - timedelta(days=i)).model_dump(mode="json"))
+                for i in range(CONCURRENT_POSTS)
+            ))
+            assert all(response.status_code == 201 for response in responses)
+
+        results["upsert_log"] = await _time(upsert_log, repeat)
+        results[f"batch_sync_{SYNC_BATCH_DAYS}d"] = await _time(batch_sync, repeat)
+        results[f"concurrent_posts_{CONCURRENT_POSTS}"] = await _time(concurrent_posts, repeat)
+        settings.WRITE_COALESCE_MS = COALESCE_MS
+        try:
+            results[f"concurrent_posts_{CONCURRENT_POSTS}_coalesced"] = await _time(
+                concurrent_posts, repeat
+            )
+        finally:
+            settings.WRITE_COALESCE_MS = 0
+        for label, start in (("1y", year_ago), ("all", first_day)):
+            results[f"get_logs_range_{label}"] = await _time(
+                lambda start=start: get(f"/logs/range/?start={start}&end={END}"), repeat
+            )
+            results[f"get_performance_{label}"] = await _time(
+                lambda start=start: get(f"/performance/?start={start}&end={END}"), repeat
+            )
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+    await read_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the backend benchmark suite.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma-separated USERSxYEARS data sizes (default {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default="benchmark_report.json")
+    parser.add_argument("--baseline", help="Report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown of the median vs the baseline (default 0.25)")
+    args = parser.parse_args()
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "machine": platform.machine(),
+        "results": {"scoring": bench_scoring(args.repeat)},
+    }
+    with tempfile.TemporaryDirectory(prefix="salah_bench_") as workdir:
+        for size in args.sizes.split(","):
+            users, years = size.split("x")
+            print(f"Benchmarking {users} users x {years} years...")
+            report["results"][size] = asyncio.run(
+                bench_size(int(users), float(years), args.repeat, workdir)
+            )
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, report, args.threshold)
+        print_comparison(rows)
+        if any(row["regressed"] for row in rows):
+            sys.exit(1)
+    else:
+        for group, benches in report["results"].items():
+            for name, stats in benches.items():
+                print(f"  {group:>10} {name:<36} {stats['median_ms']:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,63 @@ class Settings(BaseSettings):
     FIREBASE_CREDENTIALS_PATH: Optional[str] = None
     CORS_ORIGINS: str = "*"
 
+    # uvicorn worker processes started by serve.py; each has its own caches and pools
+    WORKERS: int = 1
+    # Verified Firebase ID tokens kept in memory until they expire
+    TOKEN_CACHE_SIZE: int = 10_000
+    # Resolved users kept in memory so most requests skip the users lookup
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: int = 300
+    # How often each process checks whether another one changed a cached user; 0 disables it
+    USER_CACHE_EPOCH_POLL_SECONDS: float = 1.0
+    # Serialize prayer log lists straight from row tuples with orjson
+    FAST_JSON_RESPONSES: bool = False
+    # How often Google's token signing keys are re-fetched in the background
+    SIGNING_KEY_REFRESH_SECONDS: int = 3600
+    # SQLite tuning, applied to every connection the API opens to a SQLite file
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    # Negative values are in KiB, positive values in pages
+    SQLITE_CACHE_SIZE: int = -64_000
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    # How often PRAGMA optimize runs in the background; 0 disables it
+    SQLITE_OPTIMIZE_INTERVAL_SECONDS: int = 3600
+    # Serve GET endpoints from a separate pool of query-only connections
+    SQLITE_READ_POOL: bool = True
+    SQLITE_READ_POOL_SIZE: int = 5
+    # PostgreSQL connection pool of each API process
+    PG_POOL_SIZE: int = 10
+    PG_MAX_OVERFLOW: int = 10
+    PG_POOL_TIMEOUT_SECONDS: int = 30
+    PG_POOL_RECYCLE_SECONDS: int = 1800
+    PG_POOL_PRE_PING: bool = True
+    # Server-side limits for the API's PostgreSQL sessions, in ms; 0 disables one.
+    # Migrations and maintenance scripts run without them.
+    PG_STATEMENT_TIMEOUT_MS: int = 15_000
+    PG_LOCK_TIMEOUT_MS: int = 5_000
+    PG_IDLE_IN_TRANSACTION_TIMEOUT_MS: int = 60_000
+    # Yearly prayer_logs partitions kept created ahead of the current year
+    PG_PARTITION_YEARS_AHEAD: int = 2
+    # Delete accounts after responding 202 instead of before responding 204
+    ACCOUNT_DELETION_IN_BACKGROUND: bool = False
+    # Apply pending migrations on startup; when off, startup fails on an outdated schema
+    AUTO_MIGRATE: bool = True
+    # Defer importing and initializing firebase_admin to the first request
+    # that needs it, for faster cold starts on scale-to-zero deployments
+    LAZY_STARTUP: bool = False
+    # How long /logs/sync remembers a batch's operation_id for replaying retries
+    SYNC_REPLAY_TTL_SECONDS: int = 24 * 3600
+    # Coalesce single-log writes (POST /logs/, PUT /logs/{date}) from concurrent
+    # requests into one transaction, waiting this long for more; 0 disables it
+    WRITE_COALESCE_MS: int = 0
+    WRITE_COALESCE_MAX_BATCH: int = 200
+    # Requests slower than this are logged with their query count and DB time
+    SLOW_REQUEST_MS: int = 500
+    # Bearer token that /metrics requires; unset, /metrics answers 404
+    METRICS_TOKEN: Optional[str] = None
+
     @property
     def cors_origins_list(self) -> list[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
@@ -1,7 +1,13 @@
 """Root conftest — sets test DATABASE_URL before any module is imported."""
 
+import atexit
 import os
+import shutil
 import tempfile
 
-_test_db_path = os.path.join(tempfile.gettempdir(), "salah_test.db")
+# A fresh file per session: startup migrates it, and a file left by a run
+# on a newer checkout would be at a revision this one does not know
+_test_db_dir = tempfile.mkdtemp(prefix="salah_test_")
+atexit.register(shutil.rmtree, _test_db_dir, ignore_errors=True)
+_test_db_path = os.path.join(_test_db_dir, "salah_test.db")
 os.environ["DATABASE_URL"] = f"sqlite:///{_test_db_path}"
@@ -1,8 +1,102 @@
-"""Database engine, session factory, and base model."""
+"""Database engines, session factories, and base model."""
 
-from sqlalchemy import create_engine
+import asyncio
+import logging
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
+from utils.metrics import instrument_engine, timed_pool
+
+logger = logging.getLogger(__name__)
+
+
+# Async driver used by the application for each backend in DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Rewrite a DATABASE_URL to use the async driver for its backend.
+
+    ``sqlite://`` and ``postgresql[+psycopg2]://`` URLs are mapped to aiosqlite and
+    asyncpg; anything else is returned unchanged.
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(
+        hide_password=False
+    )
+
+
+def is_sqlite_file(url) -> bool:
+    """Whether ``url`` points at an on-disk SQLite database."""
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def sqlite_pragmas(read_only: bool = False) -> list[str]:
+    """PRAGMAs run on every new SQLite connection, from the SQLITE_* settings."""
+    pragmas = [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def configure_sqlite(engine, read_only: bool = False) -> None:
+    """Apply the SQLite tuning profile to each connection ``engine`` opens.
+
+    Write connections open their transactions with BEGIN IMMEDIATE. The driver
+    still begins them lazily, at the first INSERT/UPDATE/DELETE, but the write
+    lock is then taken up front, where a busy writer in another process is
+    waited for (busy_timeout). It is never upgraded mid-transaction from a read,
+    where SQLite fails with SQLITE_BUSY at once instead of waiting.
+    """
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+        if not read_only:
+            dbapi_connection.isolation_level = "IMMEDIATE"
+
+
+def postgres_engine_options() -> dict:
+    """Pool and session settings for the API's PostgreSQL engine, from the PG_* settings.
+
+    The timeouts are sent as asyncpg ``server_settings``, so they hold for
+    every statement without a round trip per checkout.
+    """
+    return {
+        "pool_size": settings.PG_POOL_SIZE,
+        "max_overflow": settings.PG_MAX_OVERFLOW,
+        "pool_timeout": settings.PG_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.PG_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.PG_POOL_PRE_PING,
+        "connect_args": {"server_settings": {
+            "statement_timeout": str(settings.PG_STATEMENT_TIMEOUT_MS),
+            "lock_timeout": str(settings.PG_LOCK_TIMEOUT_MS),
+            "idle_in_transaction_session_timeout": str(settings.PG_IDLE_IN_TRANSACTION_TIMEOUT_MS),
+        }},
+    }
 
 
 # Handle SQLite-specific connect args
@@ -10,18 +104,100 @@ connect_args = {}
 if settings.DATABASE_URL.startswith("sqlite"):
     connect_args["check_same_thread"] = False
 
+# Synchronous engine, used by migration and maintenance scripts
 engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if settings.DATABASE_URL.startswith("sqlite"):
+    configure_sqlite(engine)
+
+
+def create_api_engine(url, read_only: bool = False, **kwargs):
+    """Create an async engine set up the way the API uses it.
+
+    SQLite connections get the tuning profile, PostgreSQL engines the pool and
+    timeout profile, and statements and pool checkouts are timed for /metrics.
+    """
+    url = make_url(url)
+    if is_sqlite_file(url):
+        # aiosqlite defaults to a new connection per checkout; keep tuned ones open
+        pool_class = AsyncAdaptedQueuePool
+    else:
+        pool_class = url.get_dialect().get_pool_class(url)
+    options = {"connect_args": connect_args}
+    if url.get_backend_name() == "postgresql":
+        options.update(postgres_engine_options())
+    options.update(kwargs)
+    async_engine = create_async_engine(url, poolclass=timed_pool(pool_class), **options)
+    if url.get_backend_name() == "sqlite":
+        configure_sqlite(async_engine.sync_engine, read_only)
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+
+# Async engine, used by the API so queries never block the event loop
+_async_url = make_url(async_database_url(settings.DATABASE_URL))
+async_engine = create_api_engine(_async_url)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Query-only SQLite connections for GET endpoints. In WAL mode readers never
+# wait for the writer, so keeping them in their own pool means reads never
+# queue behind write connections either. Other backends share one engine.
+if is_sqlite_file(_async_url) and settings.SQLITE_READ_POOL:
+    async_read_engine = create_api_engine(
+        _async_url, read_only=True, pool_size=settings.SQLITE_READ_POOL_SIZE
+    )
+else:
+    async_read_engine = async_engine
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    """FastAPI dependency that yields a database session."""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """FastAPI dependency that yields an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db():
+    """FastAPI dependency that yields a session for read-only endpoints."""
+    async with AsyncReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def get_session_factory() -> async_sessionmaker:
+    """FastAPI dependency returning the session factory.
+
+    For work that outlives the request's own session, such as streamed
+    response bodies, which are sent after ``get_db`` has closed its session.
+    """
+    return AsyncSessionLocal
+
+
+def get_read_session_factory() -> async_sessionmaker:
+    """Like ``get_session_factory``, for the read-only sessions of ``get_read_db``."""
+    return AsyncReadSessionLocal
+
+
+async def optimize_sqlite_forever() -> None:
+    """Run ``PRAGMA optimize`` every SQLITE_OPTIMIZE_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.SQLITE_OPTIMIZE_INTERVAL_SECONDS)
+        try:
+            async with async_engine.connect() as conn:
+                await conn.exec_driver_sql("PRAGMA optimize")
+        except Exception as e:
+            logger.warning(f"PRAGMA optimize failed: {e}")
+
+
+def dialect_insert(db: AsyncSession):
+    """Return the dialect-specific ``insert`` construct supporting ON CONFLICT."""
+    if db.get_bind().dialect.name == "postgresql":
+        return pg_insert
+    return sqlite_insert
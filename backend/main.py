@@ -1,12 +1,32 @@
 """Salah Tracker — FastAPI Backend Application."""
 
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import hmac
 import logging
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from contextlib import asynccontextmanager, suppress
+from typing import Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from config import settings
-from database import engine, Base
+from database import (
+    AsyncReadSessionLocal, async_engine, async_read_engine, get_db, optimize_sqlite_forever,
+)
 from routers import auth, prayer_logs, performance
+from utils.firebase_auth import (
+    check_user_cache_epoch, init_firebase, prefetch_signing_keys, refresh_signing_keys_forever,
+    watch_user_cache_epoch_forever,
+)
+from utils.metrics import MetricsMiddleware, render_metrics
+from utils.partitions import ensure_partitions
+from utils.schema import SCHEMA_REVISION, current_revision, upgrade_database
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,12 +35,64 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Application lifespan: create tables on startup."""
-    logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully.")
+    """Application lifespan: check the schema and warm the auth key cache on startup.
+
+    With LAZY_STARTUP, Firebase initialization and the signing key fetch are
+    left to the first authenticated request. Each phase's duration is logged.
+    """
+    phases = {"imports": time.perf_counter() - _import_started}
+    started = time.perf_counter()
+    async with async_engine.connect() as conn:
+        revision = await conn.run_sync(current_revision)
+    if revision != SCHEMA_REVISION:
+        if not settings.AUTO_MIGRATE:
+            raise RuntimeError(
+                f"Database schema is at revision {revision}, expected {SCHEMA_REVISION}. "
+                "Run `alembic upgrade head` from the backend directory."
+            )
+        logger.info(f"Migrating database schema from revision {revision} to {SCHEMA_REVISION}...")
+        await run_in_threadpool(upgrade_database)
+        logger.info("Database schema is up to date.")
+    if async_engine.dialect.name == "postgresql":
+        async with async_engine.connect() as conn:
+            await conn.run_sync(ensure_partitions)
+    phases["schema"] = time.perf_counter() - started
+
+    if not settings.LAZY_STARTUP:
+        started = time.perf_counter()
+        await run_in_threadpool(init_firebase)
+        phases["firebase"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        try:
+            await run_in_threadpool(prefetch_signing_keys)
+        except Exception as e:
+            logger.warning(f"Prefetching Firebase signing keys failed: {e}")
+        phases["signing_keys"] = time.perf_counter() - started
+
+    logger.info(
+        f"Startup took {sum(phases.values()) * 1000:.0f} ms ("
+        + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in phases.items())
+        + ")"
+    )
+    background = [asyncio.create_task(refresh_signing_keys_forever())]
+    if settings.USER_CACHE_EPOCH_POLL_SECONDS > 0:
+        # Know the epoch before anything is cached, then keep checking it
+        async with AsyncReadSessionLocal() as db:
+            await check_user_cache_epoch(db)
+        background.append(asyncio.create_task(watch_user_cache_epoch_forever()))
+    if async_engine.dialect.name == "sqlite" and settings.SQLITE_OPTIMIZE_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(optimize_sqlite_forever()))
+
     yield
     logger.info("Application shutting down.")
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
 
 
 app = FastAPI(
@@ -38,8 +110,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[prayer_logs.NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Per-route latency and DB metrics, served at /metrics
+app.add_middleware(MetricsMiddleware, exclude=("/metrics",))
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(prayer_logs.router)
@@ -57,9 +133,29 @@ async def root():
 
 
 @app.get("/health", tags=["Health"])
-async def health_check():
+async def health_check(db: AsyncSession = Depends(get_db)):
     """Detailed health check."""
+    try:
+        await db.execute(text("SELECT 1"))
+        database = "connected"
+    except Exception as e:
+        logger.warning(f"Health check could not reach the database: {e}")
+        database = "unreachable"
     return {
-        "status": "healthy",
-        "database": "connected",
+        "status": "healthy" if database == "connected" else "degraded",
+        "database": database,
     }
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Request latency, query count and pool metrics in Prometheus text format.
+
+    Only served with ``Authorization: Bearer <METRICS_TOKEN>``; without a
+    configured token the endpoint does not exist.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,71 @@
+"""Baseline: users and prayer_logs as created before versioned migrations.
+
+Databases created by ``create_all`` already have these tables and are left
+as they are, apart from the isha_witr column that migrate_add_witr.py used
+to add.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.migrations import has_column, has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PRAYERS = ("fajr", "dhuhr", "asr", "maghrib", "isha")
+
+
+def upgrade() -> None:
+    if not has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("google_id", sa.String(255), nullable=False),
+            sa.Column("email", sa.String(255), nullable=True),
+            sa.Column("display_name", sa.String(255), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("performance_start_date", sa.Date(), nullable=True),
+        )
+        op.create_index("ix_users_google_id", "users", ["google_id"], unique=True)
+
+    if not has_table("prayer_logs"):
+        prayer_columns = []
+        for prayer in PRAYERS:
+            prayer_columns += [
+                sa.Column(f"{prayer}_fardh", sa.Boolean(), nullable=False),
+                sa.Column(f"{prayer}_sunnah", sa.Integer(), nullable=False),
+                sa.Column(f"{prayer}_nafl", sa.Integer(), nullable=False),
+            ]
+        op.create_table(
+            "prayer_logs",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("date", sa.Date(), nullable=False),
+            *prayer_columns,
+            sa.Column("isha_witr", sa.Integer(), nullable=False),
+            sa.Column("daily_score", sa.Float(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_prayer_logs_user_id", "prayer_logs", ["user_id"])
+        op.create_index("ix_prayer_logs_date", "prayer_logs", ["date"])
+    elif not has_column("prayer_logs", "isha_witr"):
+        op.add_column(
+            "prayer_logs",
+            sa.Column("isha_witr", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("prayer_logs")
+    op.drop_table("users")
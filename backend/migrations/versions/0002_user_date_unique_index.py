@@ -0,0 +1,95 @@
+"""Enforce one prayer log per user per date.
+
+Removes duplicate (user_id, date) rows, keeping the most recently updated one,
+then builds the composite unique index uq_prayer_logs_user_date and drops the
+single-column indexes it supersedes.
+
+On PostgreSQL the index is built with CREATE INDEX CONCURRENTLY outside the
+migration transaction, so writes to prayer_logs keep flowing while it builds.
+SQLite has no online index build; the build holds the write lock for its
+(short) duration.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.migrations import has_index
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "uq_prayer_logs_user_date"
+SUPERSEDED_INDEXES = ("ix_prayer_logs_user_id", "ix_prayer_logs_date")
+INCLUDE_COLUMNS = (
+    "daily_score", "fajr_fardh", "dhuhr_fardh", "asr_fardh", "maghrib_fardh", "isha_fardh",
+)
+MAX_ATTEMPTS = 3
+
+DEDUPE_SQL = """
+    DELETE FROM prayer_logs WHERE id IN (
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY user_id, date ORDER BY updated_at DESC, id DESC
+            ) AS rn
+            FROM prayer_logs
+        ) ranked
+        WHERE rn > 1
+    )
+"""
+
+
+def _build_index_postgres(conn) -> None:
+    include = ", ".join(INCLUDE_COLUMNS)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        # A failed concurrent build leaves an INVALID index behind; clear it first
+        invalid = conn.execute(sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": INDEX_NAME}).first()
+        if invalid:
+            conn.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}"))
+
+        conn.execute(sa.text(DEDUPE_SQL))
+        try:
+            conn.execute(sa.text(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+                f"ON prayer_logs (user_id, date) INCLUDE ({include})"
+            ))
+            return
+        except sa.exc.DBAPIError:
+            # A duplicate slipped in while the index was building; dedupe and retry
+            if attempt == MAX_ATTEMPTS:
+                raise
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name == "postgresql":
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            _build_index_postgres(conn)
+            for name in SUPERSEDED_INDEXES:
+                conn.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        return
+
+    if not has_index("prayer_logs", INDEX_NAME):
+        conn.execute(sa.text(DEDUPE_SQL))
+        op.create_index(INDEX_NAME, "prayer_logs", ["user_id", "date"], unique=True)
+    for name in SUPERSEDED_INDEXES:
+        if has_index("prayer_logs", name):
+            op.drop_index(name, table_name="prayer_logs")
+
+
+def downgrade() -> None:
+    op.create_index("ix_prayer_logs_user_id", "prayer_logs", ["user_id"])
+    op.create_index("ix_prayer_logs_date", "prayer_logs", ["date"])
+    op.drop_index(INDEX_NAME, table_name="prayer_logs")
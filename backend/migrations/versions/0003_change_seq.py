@@ -0,0 +1,53 @@
+"""Add the change sequence counters behind ETags and /logs/changes.
+
+users.change_seq is bumped by every prayer log write; prayer_logs.change_seq
+records the value of the write that last touched the row. Existing rows keep
+0, so they are returned by /logs/changes on a full sync (no cursor), which is
+how every device starts.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.migrations import has_column, has_index
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_prayer_logs_user_change_seq"
+
+
+def upgrade() -> None:
+    for table in ("users", "prayer_logs"):
+        if not has_column(table, "change_seq"):
+            op.add_column(
+                table,
+                sa.Column("change_seq", sa.Integer(), nullable=False, server_default="0"),
+            )
+
+    if op.get_bind().dialect.name == "postgresql":
+        # Build the index without blocking writes
+        with op.get_context().autocommit_block():
+            op.create_index(
+                INDEX_NAME, "prayer_logs", ["user_id", "change_seq"],
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+    elif not has_index("prayer_logs", INDEX_NAME):
+        op.create_index(INDEX_NAME, "prayer_logs", ["user_id", "change_seq"])
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="prayer_logs")
+    with op.batch_alter_table("prayer_logs") as batch:
+        batch.drop_column("change_seq")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("change_seq")
@@ -0,0 +1,87 @@
+"""Add per-user monthly rollups of prayer_logs and backfill them.
+
+The backfill runs in batches of users, each committed on its own, so it never
+holds the write lock for the whole table and resumes where it stopped if
+interrupted. Run it before the app serves traffic (AUTO_MIGRATE does), or run
+rebuild_rollups.py afterwards: rollups created by live writes in the meantime
+hold only those writes' deltas.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.migrations import backfill_in_batches, has_table
+from utils.rollups import month_start_sql
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FARDH_COLUMNS = ("fajr_fardh", "dhuhr_fardh", "asr_fardh", "maghrib_fardh", "isha_fardh")
+
+users = sa.table("users", sa.column("id", sa.String))
+prayer_logs = sa.table(
+    "prayer_logs",
+    sa.column("user_id", sa.String),
+    sa.column("date", sa.Date),
+    sa.column("daily_score", sa.Float),
+    *(sa.column(col, sa.Boolean) for col in FARDH_COLUMNS),
+)
+rollups = sa.table(
+    "prayer_log_monthly_rollups",
+    sa.column("user_id", sa.String),
+    sa.column("month", sa.Date),
+    sa.column("logged_days", sa.Integer),
+    sa.column("score_hundredths", sa.Integer),
+    sa.column("fardh_completed", sa.Integer),
+)
+
+
+def _backfill(conn, user_ids) -> None:
+    month = month_start_sql(prayer_logs.c.date, conn.dialect.name)
+    fardh_per_day = sum(sa.cast(prayer_logs.c[col], sa.Integer) for col in FARDH_COLUMNS)
+    totals = (
+        sa.select(
+            prayer_logs.c.user_id,
+            month,
+            sa.func.count(),
+            sa.func.sum(sa.cast(sa.func.round(prayer_logs.c.daily_score * 100), sa.Integer)),
+            sa.func.sum(fardh_per_day),
+        )
+        .where(prayer_logs.c.user_id.in_(user_ids))
+        .group_by(prayer_logs.c.user_id, month)
+    )
+    conn.execute(rollups.insert().from_select(
+        ["user_id", "month", "logged_days", "score_hundredths", "fardh_completed"], totals
+    ))
+
+
+def upgrade() -> None:
+    if not has_table("prayer_log_monthly_rollups"):
+        op.create_table(
+            "prayer_log_monthly_rollups",
+            sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("month", sa.Date(), primary_key=True),
+            sa.Column("logged_days", sa.Integer(), nullable=False),
+            sa.Column("score_hundredths", sa.Integer(), nullable=False),
+            sa.Column("fardh_completed", sa.Integer(), nullable=False),
+        )
+
+    # Users with logs but no rollups yet
+    pending = sa.and_(
+        sa.exists().where(prayer_logs.c.user_id == users.c.id),
+        ~sa.exists().where(rollups.c.user_id == users.c.id),
+    )
+    backfill_in_batches(users.c.id, pending, _backfill, batch_size=500)
+
+
+def downgrade() -> None:
+    op.drop_table("prayer_log_monthly_rollups")
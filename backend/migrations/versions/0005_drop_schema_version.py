@@ -0,0 +1,28 @@
+"""Drop schema_version; alembic_version now tracks the schema.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.migrations import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if has_table("schema_version"):
+        op.drop_table("schema_version")
+
+
+def downgrade() -> None:
+    op.create_table("schema_version", sa.Column("version", sa.String(64), primary_key=True))
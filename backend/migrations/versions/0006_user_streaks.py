@@ -0,0 +1,77 @@
+"""Add per-user streak state and backfill it from prayer_logs.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.migrations import backfill_in_batches, has_column
+from utils.streaks import streak_state
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FARDH_COLUMNS = ("fajr_fardh", "dhuhr_fardh", "asr_fardh", "maghrib_fardh", "isha_fardh")
+
+users = sa.table(
+    "users",
+    sa.column("id", sa.String),
+    sa.column("streak_start", sa.Date),
+    sa.column("streak_end", sa.Date),
+    sa.column("longest_streak", sa.Integer),
+    sa.column("longest_streak_end", sa.Date),
+    sa.column("full_fardh_days", sa.Integer),
+)
+prayer_logs = sa.table(
+    "prayer_logs",
+    sa.column("user_id", sa.String),
+    sa.column("date", sa.Date),
+    *(sa.column(col, sa.Boolean) for col in FARDH_COLUMNS),
+)
+full_fardh = sa.and_(*(prayer_logs.c[col] for col in FARDH_COLUMNS))
+
+
+def _backfill(conn, user_ids) -> None:
+    full_days = {user_id: [] for user_id in user_ids}
+    result = conn.execute(
+        sa.select(prayer_logs.c.user_id, prayer_logs.c.date)
+        .where(sa.and_(prayer_logs.c.user_id.in_(user_ids), full_fardh))
+        .order_by(prayer_logs.c.user_id, prayer_logs.c.date)
+    )
+    for user_id, day in result:
+        full_days[user_id].append(day)
+    for user_id, days in full_days.items():
+        conn.execute(users.update().where(users.c.id == user_id).values(**streak_state(days)))
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("users") as batch:
+        for name in ("streak_start", "streak_end", "longest_streak_end"):
+            if not has_column("users", name):
+                batch.add_column(sa.Column(name, sa.Date(), nullable=True))
+        for name in ("longest_streak", "full_fardh_days"):
+            if not has_column("users", name):
+                batch.add_column(sa.Column(name, sa.Integer(), nullable=False, server_default="0"))
+
+    # Users with a full-fardh day whose state has not been computed yet
+    pending = sa.and_(
+        users.c.full_fardh_days == 0,
+        sa.exists().where(sa.and_(prayer_logs.c.user_id == users.c.id, full_fardh)),
+    )
+    backfill_in_batches(users.c.id, pending, _backfill, batch_size=500)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch:
+        for name in (
+            "streak_start", "streak_end", "longest_streak", "longest_streak_end", "full_fardh_days",
+        ):
+            batch.drop_column(name)
@@ -0,0 +1,87 @@
+"""Make prayer_logs and the monthly rollups cascade when their user is deleted.
+
+On PostgreSQL the new constraint is added NOT VALID and committed, then
+validated in its own transaction, so existing rows are checked without
+blocking writes. SQLite cannot alter a constraint, so its tables are copied
+once through batch mode. SQLite only enforces foreign keys when PRAGMA
+foreign_keys is on, so account deletion does not depend on the cascade; it
+deletes in chunks either way.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("prayer_logs", "prayer_log_monthly_rollups")
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _user_fk(table: str):
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if fk["referred_table"] == "users":
+            return fk
+    return None
+
+
+def _is_validated(table: str, name: str) -> bool:
+    return op.get_bind().scalar(sa.text(
+        "SELECT convalidated FROM pg_constraint "
+        "WHERE conrelid = CAST(:table AS regclass) AND conname = :name"
+    ), {"table": table, "name": name})
+
+
+def _replace_fk(ondelete) -> None:
+    conn = op.get_bind()
+    for table in TABLES:
+        fk = _user_fk(table)
+        replaced = fk is not None and (fk.get("options") or {}).get("ondelete") == ondelete
+
+        if conn.dialect.name == "postgresql":
+            name = fk["name"] if fk else f"{table}_user_id_fkey"
+            if not replaced:
+                if fk is not None:
+                    op.drop_constraint(name, table, type_="foreignkey")
+                cascade = f" ON DELETE {ondelete}" if ondelete else ""
+                op.execute(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY (user_id) "
+                    f"REFERENCES users (id){cascade} NOT VALID"
+                )
+            elif _is_validated(table, name):
+                continue
+            # Commit the swap first: it holds an ACCESS EXCLUSIVE lock. VALIDATE
+            # only takes SHARE UPDATE EXCLUSIVE, so writes go on during the scan.
+            # A run interrupted here validates the constraint when re-run.
+            with op.get_context().autocommit_block():
+                op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+            continue
+
+        if replaced:
+            continue
+
+        # SQLite constraints made by create_all are unnamed; name them for batch mode
+        name = NAMING_CONVENTION["fk"] % {
+            "table_name": table, "column_0_name": "user_id", "referred_table_name": "users",
+        }
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch:
+            if fk is not None:
+                batch.drop_constraint(name, type_="foreignkey")
+            batch.create_foreign_key(name, "users", ["user_id"], ["id"], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    _replace_fk("CASCADE")
+
+
+def downgrade() -> None:
+    _replace_fk(None)
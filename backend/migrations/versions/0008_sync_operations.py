@@ -0,0 +1,45 @@
+"""Add client edit times on prayer_logs and the /logs/sync replay store.
+
+Existing rows get no client_updated_at; a sync compares against their
+updated_at instead.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.migrations import has_column, has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_column("prayer_logs", "client_updated_at"):
+        op.add_column("prayer_logs", sa.Column("client_updated_at", sa.DateTime(), nullable=True))
+
+    if not has_table("sync_operations"):
+        op.create_table(
+            "sync_operations",
+            sa.Column(
+                "user_id", sa.String(36), sa.ForeignKey("users.id", ondelete="CASCADE"),
+                primary_key=True,
+            ),
+            sa.Column("operation_id", sa.String(64), primary_key=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("response", sa.Text(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("sync_operations")
+    with op.batch_alter_table("prayer_logs") as batch:
+        batch.drop_column("client_updated_at")
@@ -0,0 +1,32 @@
+"""Add the cache epoch counters that invalidate in-memory caches across workers.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.migrations import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table("cache_epochs"):
+        op.create_table(
+            "cache_epochs",
+            sa.Column("name", sa.String(32), primary_key=True),
+            sa.Column("epoch", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("cache_epochs")
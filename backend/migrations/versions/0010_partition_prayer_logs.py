@@ -0,0 +1,92 @@
+"""Partition prayer_logs by year on PostgreSQL.
+
+PostgreSQL cannot partition a table in place. The table is renamed, a
+partitioned copy with the same columns is created, with (id, date) as
+primary key since the key must include the partition column, and the rows
+are copied over before the indexes are built. This runs in one transaction
+and locks prayer_logs throughout, so run it in a maintenance window on large
+databases. See utils/partitions.py for how partitions are created.
+
+SQLite tables are not partitioned, but they get the same (id, date) primary
+key through batch mode so that migrated databases match the models.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-16
+
+"""
+import warnings
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.partitions import create_partitions, is_partitioned, partition_years
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FARDH_COLUMNS = ("fajr_fardh", "dhuhr_fardh", "asr_fardh", "maghrib_fardh", "isha_fardh")
+INDEXES = ("prayer_logs_pkey", "uq_prayer_logs_user_date", "ix_prayer_logs_user_change_seq")
+
+
+def _rebuild(partitioned: bool) -> None:
+    """Move prayer_logs into a new table, partitioned or not, keeping name and indexes."""
+    suffix = "unpartitioned" if partitioned else "partitioned"
+    old = f"prayer_logs_{suffix}"
+    op.execute(f"ALTER TABLE prayer_logs RENAME TO {old}")
+    for index in INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {index} RENAME TO {index}_{suffix}")
+
+    partition_by = " PARTITION BY RANGE (date)" if partitioned else ""
+    op.execute(f"CREATE TABLE prayer_logs (LIKE {old} INCLUDING DEFAULTS){partition_by}")
+    primary_key = "id, date" if partitioned else "id"
+    op.execute(
+        f"ALTER TABLE prayer_logs ADD CONSTRAINT prayer_logs_pkey PRIMARY KEY ({primary_key})"
+    )
+    op.create_foreign_key(
+        "prayer_logs_user_id_fkey", "prayer_logs", "users", ["user_id"], ["id"], ondelete="CASCADE"
+    )
+    if partitioned:
+        create_partitions(op.get_bind(), partition_years())
+
+    op.execute(f"INSERT INTO prayer_logs SELECT * FROM {old}")
+    op.create_index(
+        "uq_prayer_logs_user_date", "prayer_logs", ["user_id", "date"], unique=True,
+        postgresql_include=["daily_score", *FARDH_COLUMNS],
+    )
+    op.create_index("ix_prayer_logs_user_change_seq", "prayer_logs", ["user_id", "change_seq"])
+    op.execute(f"DROP TABLE {old}")
+    op.execute("ANALYZE prayer_logs")
+
+
+def _set_sqlite_primary_key(columns: list[str]) -> None:
+    if sa.inspect(op.get_bind()).get_pk_constraint("prayer_logs")["constrained_columns"] == columns:
+        return
+    with warnings.catch_warnings():
+        # Batch mode warns that the copied columns' primary key flags differ
+        # from the new constraint; the constraint is what the new table gets
+        warnings.simplefilter("ignore", sa.exc.SAWarning)
+        with op.batch_alter_table("prayer_logs", recreate="always") as batch:
+            batch.create_primary_key("prayer_logs_pkey", columns)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name == "postgresql":
+        if not is_partitioned(conn):
+            _rebuild(partitioned=True)
+    else:
+        _set_sqlite_primary_key(["id", "date"])
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name == "postgresql":
+        if is_partitioned(conn):
+            _rebuild(partitioned=False)
+    else:
+        _set_sqlite_primary_key(["id"])
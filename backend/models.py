@@ -1,10 +1,19 @@
 """SQLAlchemy ORM models for User and PrayerLog."""
 
+import operator
 import uuid
 from datetime import datetime, date
-from sqlalchemy import String, Boolean, Integer, Float, Date, DateTime, ForeignKey
+from functools import reduce
+from sqlalchemy import (
+    String, Boolean, Integer, Float, Date, DateTime, ForeignKey, Index, Text, cast, event,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from database import Base
+from utils.partitions import create_partitions, partition_years
+
+
+# The five obligatory prayers, as stored on PrayerLog
+FARDH_COLUMNS = ("fajr_fardh", "dhuhr_fardh", "asr_fardh", "maghrib_fardh", "isha_fardh")
 
 
 def generate_uuid() -> str:
@@ -20,10 +29,28 @@ class User(Base):
     display_name: Mapped[str] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     performance_start_date: Mapped[date] = mapped_column(Date, nullable=True)
+    # Bumped on every prayer log write; versions the user's read endpoints
+    change_seq: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Streaks of days with all five fardh prayed, kept in step by the upsert path
+    # (see utils/streaks.py). streak_start..streak_end is the latest run.
+    streak_start: Mapped[date] = mapped_column(Date, nullable=True)
+    streak_end: Mapped[date] = mapped_column(Date, nullable=True)
+    longest_streak: Mapped[int] = mapped_column(Integer, default=0)
+    longest_streak_end: Mapped[date] = mapped_column(Date, nullable=True)
+    full_fardh_days: Mapped[int] = mapped_column(Integer, default=0)
 
     # Relationships
+    # passive_deletes: never load a user's history just to delete it; the
+    # database cascades, and delete_user_data removes rows in chunks
     prayer_logs: Mapped[list["PrayerLog"]] = relationship(
-        "PrayerLog", back_populates="user", cascade="all, delete-orphan"
+        "PrayerLog", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
+    monthly_rollups: Mapped[list["MonthlyRollup"]] = relationship(
+        "MonthlyRollup", cascade="all, delete-orphan", passive_deletes=True
+    )
+    sync_operations: Mapped[list["SyncOperation"]] = relationship(
+        "SyncOperation", cascade="all, delete-orphan", passive_deletes=True
     )
 
 
@@ -31,8 +58,10 @@ class PrayerLog(Base):
     __tablename__ = "prayer_logs"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_uuid)
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), index=True)
-    date: Mapped[date] = mapped_column(Date, index=True)
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id", ondelete="CASCADE"))
+    # Part of the primary key because PostgreSQL partitions the table by date;
+    # migration 0010 gives SQLite the same key
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
 
     # Fajr
     fajr_fardh: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -63,6 +92,13 @@ class PrayerLog(Base):
     # Computed score
     daily_score: Mapped[float] = mapped_column(Float, default=0.0)
 
+    # User.change_seq of the write that last touched this row (drives delta sync)
+    change_seq: Mapped[int] = mapped_column(Integer, default=0)
+
+    # The client's edit time sent with the write, if any; a sync carrying an
+    # older one is stale and skipped
+    client_updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
@@ -72,7 +108,72 @@ class PrayerLog(Base):
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="prayer_logs")
 
-    # Unique constraint: one log per user per date
+    # Unique constraint: one log per user per date (also the ON CONFLICT target for upserts).
+    # Every hot query filters on (user_id, date), so this is the only index the table needs;
+    # on PostgreSQL it also carries the performance columns for index-only aggregation.
     __table_args__ = (
-        {"sqlite_autoincrement": False},
+        Index(
+            "uq_prayer_logs_user_date", "user_id", "date", unique=True,
+            postgresql_include=["daily_score", *FARDH_COLUMNS],
+        ),
+        Index("ix_prayer_logs_user_change_seq", "user_id", "change_seq"),
+        # Yearly partitions on PostgreSQL; see utils/partitions.py
+        {"sqlite_autoincrement": False, "postgresql_partition_by": "RANGE (date)"},
+    )
+
+
+@event.listens_for(PrayerLog.__table__, "after_create")
+def _create_partitions(table, connection, **kw):
+    # Tables made by create_all (tests, benchmarks) need their partitions too
+    if connection.dialect.name == "postgresql":
+        create_partitions(connection, partition_years())
+
+
+# Number of fardh prayers completed on a logged day, as a SQL expression
+FARDH_PER_DAY = reduce(
+    operator.add, (cast(getattr(PrayerLog, col), Integer) for col in FARDH_COLUMNS)
+)
+
+
+class MonthlyRollup(Base):
+    """Per-user monthly totals of PrayerLog, kept in step by the upsert path."""
+
+    __tablename__ = "prayer_log_monthly_rollups"
+
+    user_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    # First day of the month
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    logged_days: Mapped[int] = mapped_column(Integer, default=0)
+    # Sum of daily_score in hundredths; daily scores have two decimals, so this stays exact
+    score_hundredths: Mapped[int] = mapped_column(Integer, default=0)
+    fardh_completed: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class SyncOperation(Base):
+    """Response of an applied /logs/sync batch, replayed when the client retries it."""
+
+    __tablename__ = "sync_operations"
+
+    user_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
     )
+    operation_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # JSON body of the original response
+    response: Mapped[str] = mapped_column(Text)
+
+
+class CacheEpoch(Base):
+    """Counters bumped whenever data that processes cache in memory changes.
+
+    Each process polls them and drops its copy when one moves, so a change made
+    by one API worker reaches the caches of all the others.
+    """
+
+    __tablename__ = "cache_epochs"
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    epoch: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,23 @@
+"""
+Rebuild the monthly performance rollups from prayer_logs.
+
+Run any time the rollups are suspected to have drifted (migration 0004
+backfills them on upgrade): python rebuild_rollups.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from database import engine
+from models import MonthlyRollup
+from utils.rollups import rebuild_statement
+
+
+def run():
+    with engine.begin() as conn:
+        conn.execute(MonthlyRollup.__table__.delete())
+        result = conn.execute(rebuild_statement(engine.dialect.name))
+        print(f"Rebuilt {result.rowcount} monthly rollup row(s).")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,111 @@
+"""
+Recompute daily_score for every prayer log with the current scoring weights.
+
+Needed after changing utils/scoring.py (e.g. when witr joined the expected
+sunnah total). Logs are rescored in chunks with the batch scorer and only rows
+whose score actually changed are written. Each chunk commits on its own
+together with the matching monthly rollup deltas and a ``change_seq`` bump for
+every affected user, so ETag-guarded reads stop answering 304 with old scores
+and /logs/changes hands the rescored rows to incremental clients.
+
+Run: python rescore_logs.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from typing import Optional
+
+from sqlalchemy import bindparam, select, update
+from database import engine
+from models import MonthlyRollup, PrayerLog, User
+from utils.rollups import month_start, to_hundredths
+from utils.scoring import RAKAT_FIELDS, compute_scores_from_logs
+
+CHUNK_SIZE = 5000
+
+_COLUMNS = [PrayerLog.id, PrayerLog.user_id, PrayerLog.date, PrayerLog.daily_score] + [
+    getattr(PrayerLog, name) for name in (
+        "fajr_fardh", "dhuhr_fardh", "asr_fardh", "maghrib_fardh", "isha_fardh", *RAKAT_FIELDS
+    )
+]
+
+
+_logs = PrayerLog.__table__
+_rollups = MonthlyRollup.__table__
+_UPDATE_SCORE = (
+    update(_logs)
+    .where(_logs.c.id == bindparam("log_id"))
+    .values(daily_score=bindparam("score"), change_seq=bindparam("seq"))
+)
+_ADD_ROLLUP_DELTA = (
+    update(_rollups)
+    .where(_rollups.c.user_id == bindparam("uid"))
+    .where(_rollups.c.month == bindparam("month_start"))
+    .values(score_hundredths=_rollups.c.score_hundredths + bindparam("delta"))
+)
+
+
+def rescore_chunk(conn, after_id: str) -> tuple[Optional[str], int]:
+    """Rescore the next CHUNK_SIZE logs by id after ``after_id``.
+
+    Returns the last id seen (None once there are no logs left) and how many
+    scores changed.
+    """
+    rows = conn.execute(
+        select(*_COLUMNS).where(PrayerLog.id > after_id)
+        .order_by(PrayerLog.id).limit(CHUNK_SIZE)
+    ).mappings().all()
+    if not rows:
+        return None, 0
+
+    scores = compute_scores_from_logs(rows)
+    rescored = [
+        (row, score) for row, score in zip(rows, scores)
+        if score != row["daily_score"]
+    ]
+    if not rescored:
+        return rows[-1]["id"], 0
+
+    # Bump the affected users first, as the upsert path does: this holds
+    # their writers off until the chunk commits and versions the read
+    # endpoints so cached responses are revalidated. The rescored rows are
+    # stamped with the new value so /logs/changes returns them.
+    user_ids = sorted({row["user_id"] for row, _ in rescored})
+    change_seqs = dict(conn.execute(
+        update(User).where(User.id.in_(user_ids))
+        .values(change_seq=User.change_seq + 1)
+        .returning(User.id, User.change_seq)
+    ).all())
+    conn.execute(_UPDATE_SCORE, [
+        {"log_id": row["id"], "score": score, "seq": change_seqs[row["user_id"]]}
+        for row, score in rescored
+    ])
+
+    deltas = {}
+    for row, score in rescored:
+        key = (row["user_id"], month_start(row["date"]))
+        deltas[key] = deltas.get(key, 0) + to_hundredths(score) - to_hundredths(row["daily_score"])
+    rollup_deltas = [
+        {"uid": user_id, "month_start": month, "delta": delta}
+        for (user_id, month), delta in deltas.items()
+        if delta
+    ]
+    if rollup_deltas:
+        conn.execute(_ADD_ROLLUP_DELTA, rollup_deltas)
+    return rows[-1]["id"], len(rescored)
+
+
+def run():
+    changed = 0
+    last_id = ""
+    while last_id is not None:
+        # Keyset pagination on the primary key; each chunk commits on its own
+        with engine.begin() as conn:
+            last_id, count = rescore_chunk(conn, last_id)
+        changed += count
+
+    print(f"Rescored prayer logs: {changed} score(s) changed.")
+
+if __name__ == "__main__":
+    run()
@@ -1,35 +1,23 @@
 """Authentication router — Google Sign-In via Firebase."""
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from config import settings
+from database import get_db, get_session_factory
 from models import User
 from schemas import GoogleLoginRequest, UserResponse, UpdatePerformanceStartDate, DeleteAccountRequest
-from utils.firebase_auth import verify_firebase_token, get_current_user
+from utils.accounts import delete_user_data
+from utils.firebase_auth import get_current_user, invalidate_user, resolve_user, verify_firebase_token
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/google-login", response_model=UserResponse)
-async def google_login(request: GoogleLoginRequest, db: Session = Depends(get_db)):
+async def google_login(request: GoogleLoginRequest, db: AsyncSession = Depends(get_db)):
     """Verify Firebase ID token and create/return user."""
-    user_info = verify_firebase_token(request.id_token)
-
-    # Find existing user
-    user = db.query(User).filter(User.google_id == user_info["uid"]).first()
-
-    if not user:
-        # Create new user
-        user = User(
-            google_id=user_info["uid"],
-            email=user_info.get("email"),
-            display_name=user_info.get("name"),
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-    return user
+    user_info = await run_in_threadpool(verify_firebase_token, request.id_token)
+    return await resolve_user(db, user_info)
 
 
 @router.get("/me", response_model=UserResponse)
@@ -42,24 +30,41 @@ async def get_me(current_user: User = Depends(get_current_user)):
 async def update_performance_start_date(
     data: UpdatePerformanceStartDate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update the user's performance tracking start date."""
     current_user.performance_start_date = data.performance_start_date
-    db.commit()
-    db.refresh(current_user)
+    await invalidate_user(db, current_user.google_id)
+    await db.commit()
     return current_user
 
 
-@router.delete("/account", status_code=204)
+@router.delete(
+    "/account",
+    status_code=204,
+    responses={202: {"description": "Deletion accepted and running in the background"}},
+)
 async def delete_account(
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
 ):
     """Permanently delete the current user's account and all associated data.
 
     This endpoint is required for Google Play Store compliance.
-    All prayer logs are cascade-deleted automatically.
+    Prayer logs are deleted in chunks, never loaded. With
+    ACCOUNT_DELETION_IN_BACKGROUND the response is 202 and deletion finishes
+    after it is sent.
     """
-    db.delete(current_user)
-    db.commit()
+    if settings.ACCOUNT_DELETION_IN_BACKGROUND:
+        background_tasks.add_task(_delete_account, session_factory, current_user)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+    await _delete_account(session_factory, current_user)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+async def _delete_account(session_factory: async_sessionmaker, user: User) -> None:
+    await delete_user_data(session_factory, user.id)
+    async with session_factory() as db:
+        await invalidate_user(db, user.google_id)
+        await db.commit()
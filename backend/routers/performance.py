@@ -1,23 +1,55 @@
 """Performance router — compute weighted prayer performance over a date range."""
 
 from datetime import date
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from database import get_db
-from models import User, PrayerLog
-from schemas import PerformanceResponse
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_read_db
+from models import User
+from schemas import (
+    PerformanceBreakdownResponse,
+    PerformanceResponse,
+    PerformanceSeriesResponse,
+    PrayerBreakdown,
+    StreakResponse,
+)
+from utils.etag import check_etag, check_etag_on, read_fresh
 from utils.firebase_auth import get_current_user
+from utils.breakdown import breakdown_totals
+from utils.rollups import performance_totals
+from utils.scoring import PRAYERS
+from utils.series import Bucket, bucket_count, performance_series
+from utils.streaks import STREAK_COLUMNS, current_streak
 
 router = APIRouter(prefix="/performance", tags=["Performance"])
 
+# Most buckets /performance/series returns in one response
+MAX_SERIES_BUCKETS = 1000
 
-@router.get("/", response_model=PerformanceResponse)
+
+def _performance(start: date, end: date, logged_days: int, total_score: float, total_fardh: int):
+    total_days = (end - start).days + 1
+
+    # Average over TOTAL days (including unlogged = 0 score)
+    average_score = round(total_score / total_days, 2) if logged_days else 0.0
+
+    return PerformanceResponse(
+        start_date=start,
+        end_date=end,
+        total_days=total_days,
+        logged_days=logged_days,
+        average_score=average_score,
+        total_fardh_completed=total_fardh,
+        total_possible_fardh=total_days * 5,
+    )
+
+
+@router.get("/", response_model=PerformanceResponse, dependencies=[Depends(check_etag)])
 async def get_performance(
     start: date = Query(..., description="Start date (inclusive)"),
     end: date = Query(..., description="End date (inclusive)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Calculate weighted average performance score between start and end dates.
 
@@ -25,46 +57,113 @@ async def get_performance(
       - Fardh (5 per day) = 85% weight
       - Sunnah + Nafl = 15% weight
     """
-    logs = db.query(PrayerLog).filter(
-        and_(
-            PrayerLog.user_id == current_user.id,
-            PrayerLog.date >= start,
-            PrayerLog.date <= end,
-        )
-    ).order_by(PrayerLog.date).all()
+    totals = await performance_totals(db, current_user.id, start, end)
+    return _performance(start, end, *totals)
 
-    total_days = (end - start).days + 1
-    logged_days = len(logs)
-
-    if logged_days == 0:
-        return PerformanceResponse(
-            start_date=start,
-            end_date=end,
-            total_days=total_days,
-            logged_days=0,
-            average_score=0.0,
-            total_fardh_completed=0,
-            total_possible_fardh=total_days * 5,
+
+@router.get("/series", response_model=PerformanceSeriesResponse, dependencies=[Depends(check_etag)])
+async def get_performance_series(
+    start: date = Query(..., description="Start date (inclusive)"),
+    end: date = Query(..., description="End date (inclusive)"),
+    bucket: Bucket = Query("week", description="Bucket size: day, week (from Monday) or month"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Performance for every day, week or month between start and end, for trend charts.
+
+    Each bucket is scored like ``/performance/`` over its own days; buckets at
+    the edges are clipped to the requested range.
+    """
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end is before start")
+    if bucket_count(start, end, bucket) > MAX_SERIES_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans more than {MAX_SERIES_BUCKETS} {bucket} buckets",
         )
 
-    # Sum scores and fardh counts
-    total_score = sum(log.daily_score for log in logs)
-    total_fardh = sum(
-        sum([
-            log.fajr_fardh, log.dhuhr_fardh, log.asr_fardh,
-            log.maghrib_fardh, log.isha_fardh
-        ]) for log in logs
+    series = await performance_series(db, current_user.id, start, end, bucket)
+    return PerformanceSeriesResponse(
+        start_date=start,
+        end_date=end,
+        bucket=bucket,
+        buckets=[_performance(*point) for point in series],
     )
 
-    # Average over TOTAL days (including unlogged = 0 score)
-    average_score = round(total_score / total_days, 2)
 
-    return PerformanceResponse(
+@router.get(
+    "/breakdown", response_model=PerformanceBreakdownResponse, dependencies=[Depends(check_etag)]
+)
+async def get_performance_breakdown(
+    start: date = Query(..., description="Start date (inclusive)"),
+    end: date = Query(..., description="End date (inclusive)"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Per-prayer fardh completion rate and average sunnah/nafl/witr rakats.
+
+    Like ``/performance/``, rates and averages are over all days in the range,
+    so unlogged days count as missed.
+    """
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end is before start")
+
+    logged_days, totals = await breakdown_totals(db, current_user.id, start, end)
+    total_days = (end - start).days + 1
+
+    prayers = [
+        PrayerBreakdown(
+            prayer=prayer,
+            fardh_completed=totals[f"{prayer}_fardh"],
+            fardh_rate=round(totals[f"{prayer}_fardh"] / total_days, 4),
+            average_sunnah=round(totals[f"{prayer}_sunnah"] / total_days, 2),
+            average_nafl=round(totals[f"{prayer}_nafl"] / total_days, 2),
+            average_witr=(
+                round(totals["isha_witr"] / total_days, 2) if prayer == "isha" else None
+            ),
+        )
+        for prayer in PRAYERS
+    ]
+    most_missed = min(prayers, key=lambda p: p.fardh_completed).prayer if logged_days else None
+
+    return PerformanceBreakdownResponse(
         start_date=start,
         end_date=end,
         total_days=total_days,
         logged_days=logged_days,
-        average_score=average_score,
-        total_fardh_completed=total_fardh,
-        total_possible_fardh=total_days * 5,
+        prayers=prayers,
+        most_missed=most_missed,
+    )
+
+
+def _effective_today(
+    today: Optional[date] = Query(None, description="The client's current date; defaults to the server's"),
+) -> date:
+    return today or date.today()
+
+
+@router.get(
+    "/streaks", response_model=StreakResponse,
+    dependencies=[Depends(check_etag_on(_effective_today))],
+)
+async def get_streaks(
+    today: date = Depends(_effective_today),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Current and longest streaks of days with all five fardh prayers completed.
+
+    The current streak is still alive if its last day is today or yesterday.
+    """
+    row = await read_fresh(db, current_user, *(getattr(User, col) for col in STREAK_COLUMNS))
+    state = dict(zip(STREAK_COLUMNS, row))
+    current = current_streak(state["streak_start"], state["streak_end"], today)
+
+    return StreakResponse(
+        current_streak=current,
+        current_streak_start=state["streak_start"] if current else None,
+        last_full_fardh_day=state["streak_end"],
+        longest_streak=state["longest_streak"],
+        longest_streak_end=state["longest_streak_end"],
+        full_fardh_days=state["full_fardh_days"],
     )
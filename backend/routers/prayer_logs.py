@@ -1,28 +1,74 @@
 """Prayer logs router — CRUD operations for daily prayer entries."""
 
 from datetime import date, datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from database import get_db
-from models import User, PrayerLog
+from functools import partial
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from config import settings
+from database import (
+    dialect_insert, get_db, get_read_db, get_read_session_factory, get_session_factory,
+)
+from models import FARDH_COLUMNS, User, PrayerLog, generate_uuid
 from schemas import (
     PrayerLogCreate,
     PrayerLogUpdate,
     PrayerLogResponse,
     BatchSyncRequest,
     BatchSyncResponse,
+    LogChangesResponse,
+)
+from utils.etag import check_etag
+from utils.firebase_auth import get_current_user, user_cache
+from utils.rollups import apply_log_deltas, to_hundredths
+from utils.scoring import compute_scores_from_logs
+from utils.streaks import apply_streak_changes, is_full_fardh
+from utils.sync_replay import find_replay, remember_sync
+from utils.write_buffer import GroupCommitBuffer
+from utils.serialization import (
+    LOG_COLUMNS,
+    LOG_FIELDS,
+    json_response,
+    log_rows_to_dicts,
+    logs_to_dicts,
+    ndjson_line,
 )
-from utils.firebase_auth import get_current_user
-from utils.scoring import compute_score_from_log
 
 router = APIRouter(prefix="/logs", tags=["Prayer Logs"])
 
 
-def _upsert_log(db: Session, user: User, data: PrayerLogCreate) -> PrayerLog:
-    """Create or update a prayer log for a given date."""
-    
-    # Enforce zeroing out secondary prayers if Fardh is false
+# Largest page /logs/range/ returns when paginating
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Default page size of /logs/changes
+CHANGES_PAGE_SIZE = 500
+
+# Rows fetched per round trip when streaming a range or reading a whole one
+STREAM_BATCH_SIZE = 500
+
+# Rows per INSERT statement; 500 rows x 24 columns stays well under the bind
+# parameter limits of both SQLite (32766) and PostgreSQL (65535).
+SYNC_CHUNK_SIZE = 500
+
+# Columns overwritten when an upsert hits an existing (user_id, date) row
+_UPSERT_COLUMNS = [
+    name for name in PrayerLogCreate.model_fields if name != "date"
+] + ["daily_score", "change_seq", "updated_at"]
+
+# Columns compared to tell an unchanged log from an edit
+_CONTENT_COLUMNS = [
+    name for name in PrayerLogCreate.model_fields if name not in ("date", "client_updated_at")
+]
+
+# How an incoming log was handled by _upsert_logs
+APPLIED, SKIPPED, STALE = "applied", "skipped", "stale"
+
+
+def _normalize_log(data: PrayerLogCreate) -> None:
+    """Enforce zeroing out secondary prayers if Fardh is false."""
     if not data.fajr_fardh:
         data.fajr_sunnah = 0
         data.fajr_nafl = 0
@@ -40,47 +86,248 @@ def _upsert_log(db: Session, user: User, data: PrayerLogCreate) -> PrayerLog:
         data.isha_nafl = 0
         data.isha_witr = 0
 
-    existing = db.query(PrayerLog).filter(
-        and_(PrayerLog.user_id == user.id, PrayerLog.date == data.date)
-    ).first()
-
-    log_data = data.model_dump()
-    log_data.pop("date")
-
-    if existing:
-        # Update existing
-        for key, value in log_data.items():
-            setattr(existing, key, value)
-        existing.updated_at = datetime.utcnow()
-        # Recompute score
-        existing.daily_score = compute_score_from_log(existing)
-        db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        # Create new
-        log = PrayerLog(
-            user_id=user.id,
-            date=data.date,
-            **log_data,
+
+def _classify(row: dict, stored: Optional[PrayerLog]) -> str:
+    """Whether an incoming row is written, skipped as unchanged, or skipped as stale.
+
+    A row is stale when it carries a client edit time older than the stored
+    log's (its ``updated_at`` if it was written without one).
+    """
+    if stored is None:
+        return APPLIED
+    client_time = row["client_updated_at"]
+    if client_time is not None and client_time < (stored.client_updated_at or stored.updated_at):
+        return STALE
+    if all(row[col] == getattr(stored, col) for col in _CONTENT_COLUMNS):
+        return SKIPPED
+    return APPLIED
+
+
+async def _stored_logs(db: AsyncSession, user_id: str, dates: list[date]) -> dict[date, PrayerLog]:
+    stored = {}
+    for i in range(0, len(dates), SYNC_CHUNK_SIZE):
+        result = await db.scalars(
+            select(PrayerLog).where(
+                and_(PrayerLog.user_id == user_id, PrayerLog.date.in_(dates[i:i + SYNC_CHUNK_SIZE]))
+            ),
+            execution_options={"populate_existing": True},
+        )
+        stored.update((log.date, log) for log in result)
+    return stored
+
+
+async def _upsert_logs(
+    db: AsyncSession, user: User, logs: list[PrayerLogCreate], commit: bool = True
+) -> tuple[list[PrayerLog], dict[str, int]]:
+    """Create or update many prayer logs in a single transaction.
+
+    Logs identical to the stored copy, or older than it by their
+    ``client_updated_at``, are skipped (see ``_classify``). If nothing is left
+    to write, nothing is written: no ``change_seq`` bump and no commit, so
+    retried syncs cost one read.
+
+    The rest are written with one ``INSERT ... ON CONFLICT (user_id, date) DO
+    UPDATE`` statement per chunk, and the final state of each row comes back
+    through ``RETURNING`` so nothing is re-read afterwards. If the same date
+    appears more than once, the last entry wins, matching sequential upsert
+    semantics. The monthly rollups and the user's streaks are updated in the
+    same transaction from the old and new values of each written row.
+
+    Every written row is stamped with the user's new ``change_seq``.
+
+    With ``commit=False`` the caller commits, as the group-commit buffer does.
+
+    Returns the stored logs in the same order as ``logs``, and how many dates
+    were applied, skipped and stale.
+    """
+    counts = dict.fromkeys((APPLIED, SKIPPED, STALE), 0)
+    if not logs:
+        return [], counts
+
+    now = datetime.utcnow()
+    rows_by_date = {}
+    for data in logs:
+        _normalize_log(data)
+        row = data.model_dump()
+        if row["client_updated_at"] is not None:
+            # A client clock running ahead must not lock the log against later edits
+            row["client_updated_at"] = min(row["client_updated_at"], now)
+        row.update(id=generate_uuid(), user_id=user.id, created_at=now, updated_at=now)
+        rows_by_date[data.date] = row
+
+    # Most retried syncs change nothing; find out without taking the write lock
+    saved = await _stored_logs(db, user.id, list(rows_by_date))
+    outcomes = [_classify(row, saved.get(day)) for day, row in rows_by_date.items()]
+    if APPLIED not in outcomes:
+        for outcome in outcomes:
+            counts[outcome] += 1
+        return [saved[data.date] for data in logs], counts
+
+    rows = list(rows_by_date.values())
+    for row, score in zip(rows, compute_scores_from_logs(rows)):
+        row["daily_score"] = score
+
+    # Bump the user's change counter first. Besides versioning the read
+    # endpoints, this write serializes the user's writers (a row lock on
+    # PostgreSQL, the write lock on SQLite) so the stored rows re-read below
+    # cannot change before they are compared and the rollup deltas applied.
+    change_seq = await db.scalar(
+        update(User)
+        .where(User.id == user.id)
+        .values(change_seq=User.change_seq + 1)
+        .returning(User.change_seq)
+    )
+    if change_seq is None:
+        # Deleted by another worker whose cache invalidation has not reached this one yet
+        user_cache.invalidate(user.google_id)
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Account no longer exists"
+        )
+    for row in rows:
+        row["change_seq"] = change_seq
+
+    insert = dialect_insert(db)
+    streak_changes = {}
+    for i in range(0, len(rows), SYNC_CHUNK_SIZE):
+        chunk = rows[i:i + SYNC_CHUNK_SIZE]
+        stored = await _stored_logs(db, user.id, [row["date"] for row in chunk])
+        saved.update(stored)
+        writes = []
+        for row in chunk:
+            outcome = _classify(row, stored.get(row["date"]))
+            counts[outcome] += 1
+            if outcome == APPLIED:
+                writes.append(row)
+        if not writes:
+            continue
+
+        old = {
+            day: (to_hundredths(log.daily_score), sum(getattr(log, col) for col in FARDH_COLUMNS))
+            for day, log in stored.items()
+        }
+        new = {
+            row["date"]: (
+                to_hundredths(row["daily_score"]),
+                sum(row[col] for col in FARDH_COLUMNS),
+            )
+            for row in writes
+        }
+
+        stmt = insert(PrayerLog).values(writes)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PrayerLog.user_id, PrayerLog.date],
+            set_={col: stmt.excluded[col] for col in _UPSERT_COLUMNS},
+        ).returning(PrayerLog)
+        result = await db.scalars(stmt, execution_options={"populate_existing": True})
+        for log in result:
+            saved[log.date] = log
+        await apply_log_deltas(db, user.id, old, new)
+        for day, (_, fardh) in new.items():
+            full = is_full_fardh(fardh)
+            if full != is_full_fardh(old.get(day, (0, 0))[1]):
+                streak_changes[day] = full
+    await apply_streak_changes(db, user.id, streak_changes)
+    if commit:
+        await db.commit()
+
+    return [saved[data.date] for data in logs], counts
+
+
+async def _upsert_log(
+    db: AsyncSession, user: User, data: PrayerLogCreate, commit: bool = True
+) -> PrayerLog:
+    """Create or update a prayer log for a given date."""
+    return (await _upsert_logs(db, user, [data], commit))[0][0]
+
+
+# Group-commit buffers for single-log writes, one per session factory
+_write_buffers: dict[async_sessionmaker, GroupCommitBuffer] = {}
+
+
+async def _write_log(
+    db: AsyncSession, session_factory: async_sessionmaker, user: User, data: PrayerLogCreate
+) -> PrayerLog:
+    """Upsert one log, through the group-commit buffer when WRITE_COALESCE_MS is set."""
+    if settings.WRITE_COALESCE_MS <= 0:
+        return await _upsert_log(db, user, data)
+    buffer = _write_buffers.get(session_factory)
+    if buffer is None:
+        buffer = _write_buffers[session_factory] = GroupCommitBuffer(
+            session_factory,
+            partial(_upsert_log, commit=False),
+            settings.WRITE_COALESCE_MS / 1000,
+            settings.WRITE_COALESCE_MAX_BATCH,
         )
-        log.daily_score = compute_score_from_log(log)
-        db.add(log)
-        db.commit()
-        db.refresh(log)
-        return log
+    return await buffer.submit(user, data)
+
+
+@router.get("/changes", response_model=LogChangesResponse, dependencies=[Depends(check_etag)])
+async def get_log_changes(
+    response: Response,
+    since: Optional[int] = Query(
+        None, ge=0, description="Cursor from a previous call; omit for a full sync"
+    ),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get the prayer logs written after ``since``, with a cursor for the next call.
+
+    Rows written by the same request share a change sequence number and are
+    never split across pages, so a page may exceed ``limit``. Keep calling with
+    the returned cursor while ``has_more`` is true.
+    """
+    # Read the user's counter before the rows: writes for a user are serialized
+    # on this counter, so every row up to it is already committed
+    current_seq = await db.scalar(select(User.change_seq).where(User.id == current_user.id))
+
+    changed = and_(PrayerLog.user_id == current_user.id, PrayerLog.change_seq <= current_seq)
+    if since is not None:
+        changed = and_(changed, PrayerLog.change_seq > since)
+
+    # Last sequence number that fits in this page, rounded up to a whole write
+    boundary = await db.scalar(
+        select(PrayerLog.change_seq).where(changed)
+        .order_by(PrayerLog.change_seq).offset(limit - 1).limit(1)
+    )
+    cursor = boundary if boundary is not None else current_seq
+
+    fast = settings.FAST_JSON_RESPONSES
+    query = (
+        select(*(LOG_COLUMNS if fast else (PrayerLog,)))
+        .where(and_(changed, PrayerLog.change_seq <= cursor))
+        .order_by(PrayerLog.change_seq, PrayerLog.date)
+    )
+
+    if fast:
+        logs = (await db.execute(query)).all()
+        return json_response({
+            "logs": log_rows_to_dicts(logs),
+            "cursor": cursor,
+            "has_more": cursor < current_seq,
+        }, response)
+
+    logs = await db.scalars(query)
+    return LogChangesResponse(
+        logs=logs.all(),
+        cursor=cursor,
+        has_more=cursor < current_seq,
+    )
 
 
 @router.get("/{log_date}", response_model=PrayerLogResponse)
 async def get_log(
     log_date: date,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get prayer log for a specific date."""
-    log = db.query(PrayerLog).filter(
-        and_(PrayerLog.user_id == current_user.id, PrayerLog.date == log_date)
-    ).first()
+    log = await db.scalar(
+        select(PrayerLog).where(
+            and_(PrayerLog.user_id == current_user.id, PrayerLog.date == log_date)
+        )
+    )
 
     if not log:
         raise HTTPException(
@@ -94,10 +341,11 @@ async def get_log(
 async def create_log(
     data: PrayerLogCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
 ):
     """Create or upsert a prayer log. If a log exists for the date, it will be overwritten."""
-    return _upsert_log(db, current_user, data)
+    return await _write_log(db, session_factory, current_user, data)
 
 
 @router.put("/{log_date}", response_model=PrayerLogResponse)
@@ -105,46 +353,122 @@ async def update_log(
     log_date: date,
     data: PrayerLogUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
 ):
     """Update an existing prayer log for a specific date."""
     # Override the date in data with the URL param
     data.date = log_date
-    return _upsert_log(db, current_user, data)
+    return await _write_log(db, session_factory, current_user, data)
 
 
-@router.get("/range/", response_model=list[PrayerLogResponse])
+def _range_query(user: User, start: date, end: date, *columns):
+    """Select a user's logs in a date range: ORM objects, or just ``columns``."""
+    return select(*(columns or (PrayerLog,))).where(
+        and_(
+            PrayerLog.user_id == user.id,
+            PrayerLog.date >= start,
+            PrayerLog.date <= end,
+        )
+    ).order_by(PrayerLog.date)
+
+
+@router.get("/range/", response_model=list[PrayerLogResponse], dependencies=[Depends(check_etag)])
 async def get_logs_range(
+    response: Response,
     start: date = Query(..., description="Start date (inclusive)"),
     end: date = Query(..., description="End date (inclusive)"),
+    after: Optional[date] = Query(None, description="Cursor: only return logs after this date"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get all prayer logs within a date range."""
-    logs = db.query(PrayerLog).filter(
-        and_(
-            PrayerLog.user_id == current_user.id,
-            PrayerLog.date >= start,
-            PrayerLog.date <= end,
-        )
-    ).order_by(PrayerLog.date).all()
+    """Get all prayer logs within a date range.
 
+    With ``limit``, returns one page; if more logs follow, the ``X-Next-Cursor``
+    header holds the value to pass as ``after`` for the next page.
+    """
+    fast = settings.FAST_JSON_RESPONSES
+    query = _range_query(current_user, start, end, *(LOG_COLUMNS if fast else ()))
+    if after is not None:
+        query = query.where(PrayerLog.date > after)
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    if fast:
+        logs = (await db.execute(query)).all()
+    else:
+        logs = (await db.scalars(query)).all()
+
+    if limit is not None and len(logs) > limit:
+        logs = logs[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = logs[-1].date.isoformat()
+
+    if fast:
+        return json_response(log_rows_to_dicts(logs), response)
     return logs
 
 
+@router.get("/range/stream", response_class=StreamingResponse)
+async def stream_logs_range(
+    start: date = Query(..., description="Start date (inclusive)"),
+    end: date = Query(..., description="End date (inclusive)"),
+    current_user: User = Depends(get_current_user),
+    session_factory: async_sessionmaker = Depends(get_read_session_factory),
+):
+    """Stream all prayer logs within a date range as NDJSON, one log per line.
+
+    Rows are fetched from a server-side cursor in batches of ``STREAM_BATCH_SIZE``
+    and written as they arrive, so memory stays flat for full-history requests.
+    """
+    fast = settings.FAST_JSON_RESPONSES
+    query = _range_query(
+        current_user, start, end, *(LOG_COLUMNS if fast else ())
+    ).execution_options(yield_per=STREAM_BATCH_SIZE)
+
+    async def body():
+        async with session_factory() as db:
+            if fast:
+                async for row in await db.stream(query):
+                    yield ndjson_line(dict(zip(LOG_FIELDS, row)))
+            else:
+                async for log in await db.stream_scalars(query):
+                    yield PrayerLogResponse.model_validate(log).model_dump_json() + "\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
 @router.post("/sync", response_model=BatchSyncResponse)
 async def batch_sync(
     data: BatchSyncRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Batch sync multiple prayer logs (used by mobile app for offline sync)."""
-    synced_logs = []
-    for log_data in data.logs:
-        log = _upsert_log(db, current_user, log_data)
-        synced_logs.append(log)
+    """Batch sync multiple prayer logs (used by mobile app for offline sync).
+
+    With an ``operation_id``, a retry of an already applied batch gets the
+    original response back. Logs that are unchanged or older than the server
+    copy are skipped; the response counts them and includes the server copy.
+    """
+    if data.operation_id is not None:
+        replay = await find_replay(db, current_user.id, data.operation_id)
+        if replay is not None:
+            return Response(replay, media_type="application/json")
+
+    synced_logs, counts = await _upsert_logs(db, current_user, data.logs)
+    counts = {f"{outcome}_count": count for outcome, count in counts.items()}
 
+    if data.operation_id is not None or settings.FAST_JSON_RESPONSES:
+        response = json_response({
+            "synced_count": len(synced_logs),
+            **counts,
+            "logs": logs_to_dicts(synced_logs),
+        })
+        if data.operation_id is not None:
+            await remember_sync(db, current_user.id, data.operation_id, response.body)
+        return response
     return BatchSyncResponse(
         synced_count=len(synced_logs),
+        **counts,
         logs=synced_logs,
     )
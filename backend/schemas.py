@@ -1,8 +1,8 @@
 """Pydantic schemas for request/response validation."""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 
 
 # ─── Auth ───────────────────────────────────────────────────────────────
@@ -57,6 +57,17 @@ class PrayerLogCreate(BaseModel):
     isha_nafl: int = Field(default=0, ge=0)
     isha_witr: int = Field(default=0, ge=0, le=3)
 
+    # When the client last edited this log; a sync never overwrites a newer edit
+    client_updated_at: Optional[datetime] = None
+
+    @field_validator("client_updated_at")
+    @classmethod
+    def _to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Stored like the server's own timestamps: naive UTC
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
 
 class PrayerLogUpdate(PrayerLogCreate):
     pass
@@ -108,12 +119,65 @@ class PerformanceResponse(BaseModel):
     total_possible_fardh: int
 
 
+class PerformanceSeriesResponse(BaseModel):
+    start_date: date
+    end_date: date
+    bucket: str
+    # One entry per bucket, clipped to start_date..end_date
+    buckets: list[PerformanceResponse]
+
+
+class PrayerBreakdown(BaseModel):
+    prayer: str
+    fardh_completed: int
+    # Share of all days in the range (unlogged days count as missed)
+    fardh_rate: float
+    # Per day in the range
+    average_sunnah: float
+    average_nafl: float
+    average_witr: Optional[float] = None  # Isha only
+
+
+class PerformanceBreakdownResponse(BaseModel):
+    start_date: date
+    end_date: date
+    total_days: int
+    logged_days: int
+    prayers: list[PrayerBreakdown]
+    # Prayer with the lowest fardh completion; None if nothing was logged
+    most_missed: Optional[str]
+
+
+class StreakResponse(BaseModel):
+    """Runs of consecutive days with all five fardh prayers completed."""
+    current_streak: int
+    current_streak_start: Optional[date]
+    last_full_fardh_day: Optional[date]
+    longest_streak: int
+    longest_streak_end: Optional[date]
+    full_fardh_days: int
+
+
 # ─── Sync (batch) ───────────────────────────────────────────────────────
 
 class BatchSyncRequest(BaseModel):
     logs: list[PrayerLogCreate]
+    # Client-chosen ID for this batch; a retry with the same ID gets the
+    # original response back without being applied again
+    operation_id: Optional[str] = Field(default=None, min_length=1, max_length=64)
 
 
 class BatchSyncResponse(BaseModel):
     synced_count: int
+    # Logs written, logs identical to the server copy, and logs older than it
+    applied_count: int = 0
+    skipped_count: int = 0
+    stale_count: int = 0
+    # The server copy of every synced date, including skipped and stale ones
+    logs: list[PrayerLogResponse]
+
+
+class LogChangesResponse(BaseModel):
     logs: list[PrayerLogResponse]
+    cursor: int
+    has_more: bool
@@ -0,0 +1,43 @@
+"""
+Run the API with uvicorn in ``Settings.WORKERS`` processes.
+
+Pending migrations are applied here, once, before the workers start, so they
+never race each other to migrate; each worker's startup only confirms the
+revision. Workers share nothing in memory: caches of users rows are kept
+consistent through the database (see ``invalidate_user``), and on SQLite
+their writes queue on the database's write lock.
+
+Run: python serve.py [--host 0.0.0.0] [--port 8000] [--workers N]
+"""
+import argparse
+
+import uvicorn
+
+from config import settings
+
+
+def migrate() -> None:
+    from database import engine
+    from utils.schema import SCHEMA_REVISION, current_revision, upgrade_database
+
+    with engine.connect() as conn:
+        revision = current_revision(conn)
+    if revision != SCHEMA_REVISION and settings.AUTO_MIGRATE:
+        upgrade_database()
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Salah Tracker API.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WORKERS,
+                        help=f"Worker processes (default WORKERS={settings.WORKERS})")
+    args = parser.parse_args()
+
+    migrate()
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
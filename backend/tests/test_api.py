@@ -5,40 +5,58 @@ import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+import asyncio
+import json
+from datetime import date, timedelta
 import pytest
-from sqlalchemy import create_engine, StaticPool
-from sqlalchemy.orm import sessionmaker
+import httpx
+from sqlalchemy import StaticPool, delete, event, func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from fastapi.testclient import TestClient
-from database import Base, get_db
+from database import (
+    Base, create_api_engine, get_db, get_read_db, get_read_session_factory, get_session_factory,
+)
 from main import app
+from models import MonthlyRollup, PrayerLog
+from utils.firebase_auth import user_cache
+from utils.metrics import REQUEST_QUERIES, instrument_engine
+from utils.rollups import rebuild_statement
+from utils.write_buffer import GroupCommitBuffer
 
-# In-memory SQLite with StaticPool to share across threads
-test_engine = create_engine(
-    "sqlite://",
+# In-memory async SQLite with StaticPool to share one connection across event loops
+test_engine = create_async_engine(
+    "sqlite+aiosqlite://",
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
-TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+TestSessionLocal = async_sessionmaker(test_engine, autoflush=False, expire_on_commit=False)
+instrument_engine(test_engine.sync_engine)
 
 
-def override_get_db():
-    db = TestSessionLocal()
-    try:
+async def override_get_db():
+    async with TestSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-# Override the dependency
+async def _run_ddl(fn):
+    async with test_engine.begin() as conn:
+        await conn.run_sync(fn)
+
+
+# Override the dependencies
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
+app.dependency_overrides[get_session_factory] = lambda: TestSessionLocal
+app.dependency_overrides[get_read_session_factory] = lambda: TestSessionLocal
 
 
 @pytest.fixture(autouse=True)
 def setup_db():
     """Create tables before each test and drop after."""
-    Base.metadata.create_all(bind=test_engine)
+    asyncio.run(_run_ddl(Base.metadata.create_all))
+    user_cache.clear()
     yield
-    Base.metadata.drop_all(bind=test_engine)
+    asyncio.run(_run_ddl(Base.metadata.drop_all))
 
 
 @pytest.fixture
@@ -75,6 +93,22 @@ class TestAuthEndpoints:
         response = client.get("/auth/me")
         assert response.status_code == 200
 
+    def test_update_performance_start_date_refreshes_cached_user(self, client):
+        first = client.get("/auth/me").json()
+        response = client.put(
+            "/auth/performance-start-date", json={"performance_start_date": "2026-01-01"}
+        )
+        assert response.status_code == 200
+        me = client.get("/auth/me").json()
+        assert me["id"] == first["id"]
+        assert me["performance_start_date"] == "2026-01-01"
+
+    def test_user_is_resolved_from_cache(self, client):
+        client.get("/auth/me")
+        hits = user_cache.hits
+        client.get("/auth/me")
+        assert user_cache.hits == hits + 1
+
 
 class TestPrayerLogEndpoints:
     def _login(self, client):
@@ -149,6 +183,47 @@ class TestPrayerLogEndpoints:
         assert response.status_code == 200
         assert len(response.json()) == 2
 
+    def _sync_days(self, client, n):
+        self._login(client)
+        client.post("/logs/sync", json={"logs": [
+            {"date": (date(2026, 1, 1) + timedelta(days=i)).isoformat(), "fajr_fardh": True}
+            for i in range(n)
+        ]})
+
+    def test_range_pagination(self, client):
+        self._sync_days(client, 25)
+        dates, after = [], None
+        while True:
+            url = "/logs/range/?start=2026-01-01&end=2026-12-31&limit=10"
+            if after:
+                url += f"&after={after}"
+            response = client.get(url)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 10
+            dates += [log["date"] for log in page]
+            after = response.headers.get("X-Next-Cursor")
+            if after is None:
+                break
+        assert len(dates) == 25
+        assert dates == sorted(dates)
+        assert len(set(dates)) == 25
+
+    def test_range_exact_page_has_no_cursor(self, client):
+        self._sync_days(client, 10)
+        response = client.get("/logs/range/?start=2026-01-01&end=2026-12-31&limit=10")
+        assert len(response.json()) == 10
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_range_stream_ndjson(self, client):
+        self._sync_days(client, 12)
+        response = client.get("/logs/range/stream?start=2026-01-03&end=2026-01-07")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [log["date"] for log in lines] == [f"2026-01-0{d}" for d in range(3, 8)]
+        assert lines[0] == client.get("/logs/2026-01-03").json()
+
 
 class TestPerformanceEndpoints:
     def _login_and_log(self, client):
@@ -170,6 +245,22 @@ class TestPerformanceEndpoints:
         assert data["average_score"] == 100.0
         assert data["total_fardh_completed"] == 5
 
+    def test_performance_aggregates_range(self, client):
+        client.post("/auth/google-login", json={"id_token": "mock"})
+        client.post("/logs/sync", json={"logs": [
+            {"date": "2026-02-01", "fajr_fardh": True, "dhuhr_fardh": True},
+            {"date": "2026-02-02", "fajr_fardh": True, "dhuhr_fardh": True,
+             "asr_fardh": True, "maghrib_fardh": True, "isha_fardh": True},
+            {"date": "2026-03-01", "fajr_fardh": True},
+        ]})
+        response = client.get("/performance/?start=2026-02-01&end=2026-02-10")
+        data = response.json()
+        assert data["total_days"] == 10
+        assert data["logged_days"] == 2
+        assert data["total_fardh_completed"] == 7
+        assert data["total_possible_fardh"] == 50
+        assert data["average_score"] == round((34.0 + 85.0) / 10, 2)
+
     def test_performance_empty_range(self, client):
         client.post("/auth/google-login", json={"id_token": "mock"})
         response = client.get("/performance/?start=2026-01-01&end=2026-01-31")
@@ -212,3 +303,727 @@ class TestDeleteAccount:
         response = client.get("/logs/2026-02-19")
         assert response.status_code == 404
 
+    def _user_rows(self):
+        from models import PrayerLog, User
+
+        async def count():
+            async with TestSessionLocal() as db:
+                return [
+                    len((await db.scalars(select(model))).all())
+                    for model in (User, PrayerLog, MonthlyRollup)
+                ]
+        return asyncio.run(count())
+
+    @pytest.mark.parametrize("background", [False, True])
+    def test_delete_account_in_chunks(self, client, monkeypatch, background):
+        from config import settings
+        from utils import accounts
+        monkeypatch.setattr(accounts, "DELETE_CHUNK_SIZE", 3)
+        monkeypatch.setattr(settings, "ACCOUNT_DELETION_IN_BACKGROUND", background)
+        self._login(client)
+        client.post("/logs/sync", json={"logs": [
+            {"date": f"2026-0{m}-{d:02d}", "fajr_fardh": True} for m in (1, 2) for d in range(1, 6)
+        ]})
+        assert self._user_rows() == [1, 10, 2]
+
+        response = client.delete("/auth/account")
+        assert response.status_code == (202 if background else 204)
+        assert self._user_rows() == [0, 0, 0]
+
+
+class TestBatchSync:
+    def _login(self, client):
+        client.post("/auth/google-login", json={"id_token": "mock"})
+
+    def test_sync_inserts_and_updates(self, client):
+        self._login(client)
+        client.post("/logs/", json={"date": "2026-02-18", "fajr_fardh": False})
+        response = client.post("/logs/sync", json={"logs": [
+            {"date": "2026-02-18", "fajr_fardh": True, "fajr_sunnah": 2},
+            {"date": "2026-02-19", "isha_fardh": True, "isha_witr": 3},
+        ]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["synced_count"] == 2
+        assert [log["date"] for log in data["logs"]] == ["2026-02-18", "2026-02-19"]
+        assert data["logs"][0]["fajr_fardh"] is True
+        assert data["logs"][0]["daily_score"] > 0
+
+        response = client.get("/logs/range/?start=2026-02-18&end=2026-02-19")
+        assert len(response.json()) == 2
+
+    def test_sync_duplicate_dates_last_wins(self, client):
+        self._login(client)
+        response = client.post("/logs/sync", json={"logs": [
+            {"date": "2026-02-19", "fajr_fardh": True},
+            {"date": "2026-02-19", "fajr_fardh": False, "fajr_sunnah": 2},
+        ]})
+        assert response.status_code == 200
+        logs = response.json()["logs"]
+        assert logs[0]["id"] == logs[1]["id"]
+        assert logs[1]["fajr_fardh"] is False
+        # Sunnah is zeroed when the fardh is not prayed
+        assert logs[1]["fajr_sunnah"] == 0
+
+    def test_sync_keeps_existing_row_identity(self, client):
+        self._login(client)
+        created = client.post("/logs/", json={"date": "2026-02-19"}).json()
+        response = client.post("/logs/sync", json={"logs": [
+            {"date": "2026-02-19", "dhuhr_fardh": True},
+        ]})
+        synced = response.json()["logs"][0]
+        assert synced["id"] == created["id"]
+        assert synced["created_at"] == created["created_at"]
+        assert synced["dhuhr_fardh"] is True
+
+    def test_resent_logs_are_skipped_without_writing(self, client):
+        self._login(client)
+        logs = [
+            {"date": "2026-02-18", "fajr_fardh": True},
+            {"date": "2026-02-19", "isha_fardh": True, "isha_witr": 3},
+        ]
+        first = client.post("/logs/sync", json={"logs": logs}).json()
+        assert (first["applied_count"], first["skipped_count"], first["stale_count"]) == (2, 0, 0)
+        cursor = client.get("/logs/changes").json()["cursor"]
+
+        logs[1]["isha_witr"] = 1
+        second = client.post("/logs/sync", json={"logs": logs}).json()
+        assert (second["applied_count"], second["skipped_count"], second["stale_count"]) == (1, 1, 0)
+        assert second["logs"][0]["updated_at"] == first["logs"][0]["updated_at"]
+        assert second["logs"][1]["isha_witr"] == 1
+
+        changes = client.get(f"/logs/changes?since={cursor}").json()
+        assert [log["date"] for log in changes["logs"]] == ["2026-02-19"]
+        third = client.post("/logs/sync", json={"logs": logs}).json()
+        assert third["skipped_count"] == 2
+        assert client.get("/logs/changes").json()["cursor"] == changes["cursor"]
+
+    def test_older_client_edit_is_stale(self, client):
+        self._login(client)
+        client.post("/logs/sync", json={"logs": [
+            {"date": "2026-02-19", "fajr_fardh": True, "client_updated_at": "2024-02-19T10:00:00+03:00"},
+        ]})
+        response = client.post("/logs/sync", json={"logs": [
+            {"date": "2026-02-19", "fajr_fardh": False, "client_updated_at": "2024-02-19T06:00:00Z"},
+        ]})
+        data = response.json()
+        assert (data["applied_count"], data["stale_count"]) == (0, 1)
+        # The server copy comes back so the client can reconcile
+        assert data["logs"][0]["fajr_fardh"] is True
+
+        response = client.post("/logs/sync", json={"logs": [
+            {"date": "2026-02-19", "fajr_fardh": False, "client_updated_at": "2024-02-19T07:30:00Z"},
+        ]})
+        assert response.json()["applied_count"] == 1
+        assert client.get("/logs/2026-02-19").json()["fajr_fardh"] is False
+
+    def test_operation_id_replays_the_first_response(self, client):
+        self._login(client)
+        batch = {"operation_id": "batch-1", "logs": [{"date": "2026-02-19", "fajr_fardh": True}]}
+        first = client.post("/logs/sync", json=batch)
+        client.put("/logs/2026-02-19", json={"date": "2026-02-19", "fajr_fardh": False})
+
+        retry = client.post("/logs/sync", json=batch)
+        assert retry.status_code == 200
+        assert retry.content == first.content
+        # The retry was not applied over the later edit
+        assert client.get("/logs/2026-02-19").json()["fajr_fardh"] is False
+
+        other = client.post("/logs/sync", json={**batch, "operation_id": "batch-2"})
+        assert other.json()["applied_count"] == 1
+
+
+class TestTokenCache:
+    def test_verified_token_is_cached(self, client, monkeypatch):
+        import time
+        from types import SimpleNamespace
+        from utils import firebase_auth as fa
+
+        calls = []
+
+        def fake_verify(token):
+            calls.append(token)
+            return {"uid": "cached_uid", "email": "c@x.test", "exp": time.time() + 3600}
+
+        monkeypatch.setattr(fa, "_firebase_initialized", True)
+        monkeypatch.setattr(fa, "firebase_auth", SimpleNamespace(verify_id_token=fake_verify))
+        fa.token_cache.clear()
+
+        headers = {"Authorization": "Bearer token-abc"}
+        assert client.get("/auth/me", headers=headers).status_code == 200
+        hits = fa.token_cache.hits
+        assert client.get("/auth/me", headers=headers).status_code == 200
+        assert calls == ["token-abc"]
+        assert fa.token_cache.hits == hits + 1
+
+
+class TestMonthlyRollups:
+    def _sync_history(self, client):
+        client.post("/auth/google-login", json={"id_token": "mock"})
+        logs = []
+        for i in range(70):
+            day = date(2026, 1, 20) + timedelta(days=i)
+            logs.append({
+                "date": day.isoformat(),
+                "fajr_fardh": i % 2 == 0, "fajr_sunnah": i % 3,
+                "dhuhr_fardh": i % 3 != 0, "dhuhr_sunnah": 4,
+                "asr_fardh": True,
+                "maghrib_fardh": i % 5 != 0, "maghrib_nafl": 2,
+                "isha_fardh": i % 7 != 0, "isha_witr": 3,
+            })
+        client.post("/logs/sync", json={"logs": logs})
+        # Rewrite a few days so the rollups see updates as well as inserts
+        client.post("/logs/sync", json={"logs": [
+            {"date": "2026-02-10"},
+            {"date": "2026-03-01", "fajr_fardh": True, "dhuhr_fardh": True},
+            {"date": "2026-03-31", "isha_fardh": True},
+        ]})
+
+    def _expected(self, client, start, end):
+        logs = client.get(f"/logs/range/?start={start}&end={end}").json()
+        return (
+            len(logs),
+            round(sum(log["daily_score"] for log in logs) / ((end - start).days + 1), 2),
+            sum(log[f"{p}_fardh"] for log in logs for p in ("fajr", "dhuhr", "asr", "maghrib", "isha")),
+        )
+
+    def test_performance_matches_raw_logs(self, client):
+        self._sync_history(client)
+        ranges = [
+            (date(2026, 1, 1), date(2026, 12, 31)),
+            (date(2026, 2, 1), date(2026, 2, 28)),
+            (date(2026, 1, 25), date(2026, 3, 5)),
+            (date(2026, 2, 1), date(2026, 3, 31)),
+            (date(2026, 2, 10), date(2026, 2, 20)),
+        ]
+        for start, end in ranges:
+            data = client.get(f"/performance/?start={start}&end={end}").json()
+            actual = (data["logged_days"], data["average_score"], data["total_fardh_completed"])
+            assert actual == self._expected(client, start, end), (start, end)
+
+    @pytest.mark.parametrize("bucket", ["day", "week", "month"])
+    def test_series_matches_per_bucket_calls(self, client, bucket):
+        self._sync_history(client)
+        response = client.get(f"/performance/series?start=2026-01-07&end=2026-04-02&bucket={bucket}")
+        assert response.status_code == 200
+        buckets = response.json()["buckets"]
+        assert buckets[0]["start_date"] == "2026-01-07"
+        assert buckets[-1]["end_date"] == "2026-04-02"
+        assert {"day": 86, "week": 13, "month": 4}[bucket] == len(buckets)
+        for point in buckets:
+            expected = client.get(
+                f"/performance/?start={point['start_date']}&end={point['end_date']}"
+            ).json()
+            assert point == expected
+
+    def test_breakdown_matches_raw_logs(self, client):
+        self._sync_history(client)
+        start, end = date(2026, 2, 1), date(2026, 3, 15)
+        logs = client.get(f"/logs/range/?start={start}&end={end}").json()
+        total_days = (end - start).days + 1
+
+        response = client.get(f"/performance/breakdown?start={start}&end={end}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["logged_days"] == len(logs)
+        for entry in data["prayers"]:
+            prayer = entry["prayer"]
+            completed = sum(log[f"{prayer}_fardh"] for log in logs)
+            assert entry["fardh_completed"] == completed
+            assert entry["fardh_rate"] == round(completed / total_days, 4)
+            assert entry["average_sunnah"] == round(
+                sum(log[f"{prayer}_sunnah"] for log in logs) / total_days, 2
+            )
+            assert entry["average_nafl"] == round(
+                sum(log[f"{prayer}_nafl"] for log in logs) / total_days, 2
+            )
+        assert data["prayers"][-1]["average_witr"] == round(
+            sum(log["isha_witr"] for log in logs) / total_days, 2
+        )
+        assert data["most_missed"] == "fajr"
+
+    def test_series_rejects_too_many_buckets(self, client):
+        response = client.get("/performance/series?start=2020-01-01&end=2026-01-01&bucket=day")
+        assert response.status_code == 400
+
+    def test_rebuild_matches_incremental_rollups(self, client):
+        self._sync_history(client)
+
+        async def rollups():
+            async with test_engine.connect() as conn:
+                result = await conn.execute(
+                    select(MonthlyRollup).order_by(MonthlyRollup.month)
+                )
+                return result.all()
+
+        async def rebuild():
+            async with test_engine.begin() as conn:
+                await conn.execute(delete(MonthlyRollup))
+                await conn.execute(rebuild_statement("sqlite"))
+
+        incremental = asyncio.run(rollups())
+        asyncio.run(rebuild())
+        assert len(incremental) == 3
+        assert asyncio.run(rollups()) == incremental
+
+
+class TestStreaks:
+    START = date(2026, 3, 1)
+
+    def _log(self, day: date, full: bool) -> dict:
+        prayers = ("fajr", "dhuhr", "asr", "maghrib", "isha")
+        return {"date": day.isoformat(), **{f"{p}_fardh": full or p != "asr" for p in prayers}}
+
+    def _streaks(self, client, today: date) -> dict:
+        response = client.get(f"/performance/streaks?today={today}")
+        assert response.status_code == 200
+        return response.json()
+
+    def test_consecutive_days(self, client):
+        client.post("/auth/google-login", json={"id_token": "mock"})
+        days = [self.START + timedelta(days=i) for i in range(5)]
+        client.post("/logs/sync", json={"logs": [self._log(d, d != days[1]) for d in days]})
+
+        data = self._streaks(client, days[-1])
+        assert data["current_streak"] == 3
+        assert data["current_streak_start"] == days[2].isoformat()
+        assert data["longest_streak"] == 3
+        assert data["full_fardh_days"] == 4
+
+        # Filling the gap joins both runs
+        assert client.put(f"/logs/{days[1]}", json=self._log(days[1], True)).status_code == 200
+        assert self._streaks(client, days[-1])["current_streak"] == 5
+        # A streak that ended before yesterday is not current
+        assert self._streaks(client, days[-1] + timedelta(days=2))["current_streak"] == 0
+
+    def test_etag_changes_with_the_day(self, client):
+        client.post("/auth/google-login", json={"id_token": "mock"})
+        client.post("/logs/", json=self._log(self.START, True))
+        url = "/performance/streaks?today={}"
+        etag = client.get(url.format(self.START)).headers["ETag"]
+        assert client.get(url.format(self.START), headers={"If-None-Match": etag}).status_code == 304
+
+        # Two days later the streak has lapsed although no log changed
+        response = client.get(url.format(self.START + timedelta(days=2)), headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["current_streak"] == 0
+
+    @pytest.mark.parametrize("window", [366, 2])
+    def test_matches_recomputation_after_random_edits(self, client, monkeypatch, window):
+        import random
+        from utils import streaks
+        from utils.streaks import current_streak, streak_state
+
+        # A tiny window makes the rescans cross several windows
+        monkeypatch.setattr(streaks, "RESCAN_WINDOW", window)
+        client.post("/auth/google-login", json={"id_token": "mock"})
+        rng = random.Random(7)
+        full = {}
+        for _ in range(60):
+            days = [self.START + timedelta(days=rng.randrange(40)) for _ in range(rng.choice([1, 1, 3, 8]))]
+            logs = [self._log(d, rng.random() < 0.7) for d in days]
+            assert client.post("/logs/sync", json={"logs": logs}).status_code == 200
+            for log in logs:
+                full[date.fromisoformat(log["date"])] = log["asr_fardh"]
+
+            today = self.START + timedelta(days=40)
+            expected = streak_state(sorted(d for d, f in full.items() if f))
+            data = self._streaks(client, today)
+            assert data["longest_streak"] == expected["longest_streak"]
+            assert data["full_fardh_days"] == expected["full_fardh_days"]
+            assert data["last_full_fardh_day"] == (
+                expected["streak_end"] and expected["streak_end"].isoformat()
+            )
+            assert data["current_streak"] == current_streak(
+                expected["streak_start"], expected["streak_end"], today
+            )
+
+
+class TestETags:
+    def _login(self, client):
+        client.post("/auth/google-login", json={"id_token": "mock"})
+
+    def test_unchanged_range_returns_304(self, client):
+        self._login(client)
+        client.post("/logs/", json={"date": "2026-02-19", "fajr_fardh": True})
+        url = "/logs/range/?start=2026-02-01&end=2026-02-28"
+        first = client.get(url)
+        etag = first.headers["ETag"]
+        assert first.status_code == 200
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    def test_write_changes_etag(self, client):
+        self._login(client)
+        url = "/performance/?start=2026-02-01&end=2026-02-28"
+        etag = client.get(url).headers["ETag"]
+        client.post("/logs/", json={"date": "2026-02-19", "fajr_fardh": True})
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.json()["logged_days"] == 1
+
+    def test_if_none_match_list(self, client):
+        self._login(client)
+        url = "/performance/?start=2026-02-01&end=2026-02-28"
+        etag = client.get(url).headers["ETag"]
+        response = client.get(url, headers={"If-None-Match": f'"stale", {etag}'})
+        assert response.status_code == 304
+
+    def test_rescore_changes_etag(self, client):
+        import rescore_logs
+
+        self._login(client)
+        client.post("/logs/", json={"date": "2026-02-19", "fajr_fardh": True, "isha_witr": 3})
+        url = "/performance/?start=2026-02-01&end=2026-02-28"
+        expected = client.get(url).json()
+
+        async def score_with_old_weights():
+            async with test_engine.begin() as conn:
+                await conn.execute(update(PrayerLog).values(daily_score=1.0))
+                await conn.execute(delete(MonthlyRollup))
+                await conn.execute(rebuild_statement("sqlite"))
+
+        async def rescore():
+            async with test_engine.begin() as conn:
+                return await conn.run_sync(rescore_logs.rescore_chunk, "")
+
+        asyncio.run(score_with_old_weights())
+        etag = client.get(url).headers["ETag"]
+        assert asyncio.run(rescore())[1] == 1
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json() == expected
+
+
+class TestLogChanges:
+    def _login(self, client):
+        client.post("/auth/google-login", json={"id_token": "mock"})
+
+    def _sync(self, client, dates, **fields):
+        client.post("/logs/sync", json={"logs": [{"date": d, **fields} for d in dates]})
+
+    def test_full_then_delta(self, client):
+        self._login(client)
+        self._sync(client, ["2026-02-01", "2026-02-02"])
+        full = client.get("/logs/changes").json()
+        assert [log["date"] for log in full["logs"]] == ["2026-02-01", "2026-02-02"]
+        assert full["has_more"] is False
+
+        # Nothing new since the cursor
+        empty = client.get(f"/logs/changes?since={full['cursor']}").json()
+        assert empty["logs"] == []
+        assert empty["cursor"] == full["cursor"]
+
+        client.post("/logs/", json={"date": "2026-02-01", "fajr_fardh": True})
+        delta = client.get(f"/logs/changes?since={full['cursor']}").json()
+        assert [log["date"] for log in delta["logs"]] == ["2026-02-01"]
+        assert delta["logs"][0]["fajr_fardh"] is True
+        assert delta["cursor"] > full["cursor"]
+
+    def test_rescored_logs_are_in_the_delta(self, client):
+        import rescore_logs
+
+        self._login(client)
+        self._sync(client, ["2026-02-01", "2026-02-02"], fajr_fardh=True)
+        score = client.get("/logs/2026-02-02").json()["daily_score"]
+
+        async def rescore_one_day():
+            async with test_engine.begin() as conn:
+                await conn.execute(
+                    update(PrayerLog).where(PrayerLog.date == date(2026, 2, 2)).values(daily_score=0.0)
+                )
+                cursor = await conn.scalar(select(func.max(PrayerLog.change_seq)))
+                await conn.run_sync(rescore_logs.rescore_chunk, "")
+                return cursor
+
+        cursor = asyncio.run(rescore_one_day())
+        delta = client.get(f"/logs/changes?since={cursor}").json()
+        assert [log["date"] for log in delta["logs"]] == ["2026-02-02"]
+        assert delta["logs"][0]["daily_score"] == score
+
+    def test_pages_never_split_a_write(self, client):
+        self._login(client)
+        self._sync(client, ["2026-02-01", "2026-02-02", "2026-02-03"])
+        self._sync(client, ["2026-02-04"])
+        self._sync(client, ["2026-02-05", "2026-02-06"])
+
+        seen, cursor, page_sizes = [], None, []
+        while True:
+            url = "/logs/changes?limit=2" + (f"&since={cursor}" if cursor is not None else "")
+            page = client.get(url).json()
+            page_sizes.append(len(page["logs"]))
+            seen += [log["date"] for log in page["logs"]]
+            cursor = page["cursor"]
+            if not page["has_more"]:
+                break
+        # The first write (3 logs) overflows the page; the second page ends on the last write
+        assert page_sizes == [3, 3]
+        assert seen == [f"2026-02-0{d}" for d in range(1, 7)]
+
+
+class TestFastJsonResponses:
+    def _seed(self, client):
+        client.post("/auth/google-login", json={"id_token": "mock"})
+        client.post("/logs/sync", json={"logs": [
+            {"date": f"2026-02-{d:02d}", "fajr_fardh": True, "fajr_sunnah": d % 3, "isha_witr": 0}
+            for d in range(1, 15)
+        ]})
+
+    def test_fast_path_output_is_identical(self, client, monkeypatch):
+        from config import settings
+        self._seed(client)
+        urls = [
+            "/logs/range/?start=2026-02-01&end=2026-02-28",
+            "/logs/range/?start=2026-02-01&end=2026-02-28&limit=5&after=2026-02-03",
+            "/logs/range/stream?start=2026-02-01&end=2026-02-28",
+            "/logs/changes?limit=3",
+        ]
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+        slow = [client.get(url) for url in urls]
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+        fast = [client.get(url) for url in urls]
+        for url, a, b in zip(urls, slow, fast):
+            assert b.status_code == 200, url
+            assert b.content == a.content, url
+            assert b.headers.get("ETag") == a.headers.get("ETag"), url
+            assert b.headers.get("X-Next-Cursor") == a.headers.get("X-Next-Cursor"), url
+
+    def test_fast_path_sync(self, client, monkeypatch):
+        from config import settings
+        self._seed(client)
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+        response = client.post("/logs/sync", json={"logs": [{"date": "2026-02-01"}]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["synced_count"] == 1
+        assert data["logs"][0]["fajr_fardh"] is False
+
+
+class TestGroupCommit:
+    def test_concurrent_posts_share_one_commit(self, client, monkeypatch):
+        from config import settings
+        from routers import prayer_logs
+        client.post("/auth/google-login", json={"id_token": "mock"})
+        monkeypatch.setattr(settings, "WRITE_COALESCE_MS", 50)
+        monkeypatch.setattr(prayer_logs, "_write_buffers", {})
+        commits = []
+
+        def listener(conn):
+            commits.append(1)
+
+        event.listen(test_engine.sync_engine, "commit", listener)
+
+        async def post_all():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                return await asyncio.gather(*(
+                    ac.post("/logs/", json={"date": f"2026-02-{d:02d}", "fajr_fardh": True})
+                    for d in range(1, 11)
+                ))
+
+        try:
+            responses = asyncio.run(post_all())
+        finally:
+            event.remove(test_engine.sync_engine, "commit", listener)
+        assert [r.status_code for r in responses] == [201] * 10
+        assert [r.json()["date"] for r in responses] == [f"2026-02-{d:02d}" for d in range(1, 11)]
+        assert len(commits) == 1
+        assert len(client.get("/logs/range/?start=2026-02-01&end=2026-02-28").json()) == 10
+
+    def test_failed_write_only_fails_its_own_caller(self):
+        async def write(db, n):
+            if n == 3:
+                raise ValueError("bad write")
+            return n
+
+        async def submit_all():
+            buffer = GroupCommitBuffer(TestSessionLocal, write, 0.01, 100)
+            return await asyncio.gather(
+                *(buffer.submit(n) for n in range(5)), return_exceptions=True
+            )
+
+        results = asyncio.run(submit_all())
+        assert results[:3] == [0, 1, 2] and results[4] == 4
+        assert isinstance(results[3], ValueError)
+
+
+class TestMetrics:
+    @pytest.fixture(autouse=True)
+    def metrics_token(self, monkeypatch):
+        from config import settings
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "secret")
+
+    def test_metrics_require_the_token(self, client, monkeypatch):
+        from config import settings
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+        assert client.get("/metrics", headers={"Authorization": "Bearer secret"}).status_code == 404
+
+    def test_route_latency_and_queries(self, client):
+        client.get("/logs/2026-02-01")
+        before = REQUEST_QUERIES.count("GET", "/logs/{log_date}")
+        client.get("/logs/2026-02-02")
+        assert REQUEST_QUERIES.count("GET", "/logs/{log_date}") == before + 1
+
+        body = client.get("/metrics", headers={"Authorization": "Bearer secret"}).text
+        assert '# TYPE salah_request_duration_seconds histogram' in body
+        assert 'salah_request_duration_seconds_count{method="GET",route="/logs/{log_date}"}' in body
+        # The route template is the label, not the concrete path
+        assert "2026-02-02" not in body
+        assert "/metrics" not in body
+
+    def test_query_count_is_attributed(self, client):
+        client.get("/logs/2026-02-01")
+        before = REQUEST_QUERIES._series[("GET", "/logs/{log_date}")][1]
+        client.get("/logs/2026-02-01")
+        queries = REQUEST_QUERIES._series[("GET", "/logs/{log_date}")][1] - before
+        # Cached user: the log lookup is the only statement
+        assert queries == 1
+
+    def test_slow_request_is_logged(self, client, monkeypatch, caplog):
+        from config import settings
+        monkeypatch.setattr(settings, "SLOW_REQUEST_MS", 0)
+        with caplog.at_level("WARNING", logger="utils.metrics"):
+            client.get("/logs/2026-02-01")
+        assert "Slow request: GET /logs/{log_date} -> 404" in caplog.text
+        assert "queries" in caplog.text
+
+
+class TestSqliteProfile:
+    @staticmethod
+    async def _pragmas(engine, *names):
+        async with engine.connect() as conn:
+            return [(await conn.exec_driver_sql(f"PRAGMA {name}")).scalar() for name in names]
+
+    def test_file_connections_are_tuned(self, tmp_path):
+        url = f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}"
+
+        async def run():
+            engine = create_api_engine(url)
+            try:
+                return await self._pragmas(engine, "journal_mode", "synchronous", "busy_timeout")
+            finally:
+                await engine.dispose()
+
+        # synchronous=NORMAL is 1
+        assert asyncio.run(run()) == ["wal", 1, 5000]
+
+    def test_read_engine_rejects_writes(self, tmp_path):
+        from sqlalchemy.exc import OperationalError
+        url = f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}"
+
+        async def run():
+            engine = create_api_engine(url)
+            read_engine = create_api_engine(url, read_only=True)
+            try:
+                async with engine.begin() as conn:
+                    await conn.exec_driver_sql("CREATE TABLE t (x INTEGER)")
+                async with read_engine.connect() as conn:
+                    assert (await conn.exec_driver_sql("SELECT count(*) FROM t")).scalar() == 0
+                    with pytest.raises(OperationalError, match="readonly"):
+                        await conn.exec_driver_sql("INSERT INTO t VALUES (1)")
+            finally:
+                await engine.dispose()
+                await read_engine.dispose()
+
+        asyncio.run(run())
+
+    def test_write_connections_begin_immediate(self, tmp_path):
+        url = f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}"
+
+        async def run():
+            engine = create_api_engine(url)
+            statements = []
+            try:
+                async with engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    await raw.driver_connection.set_trace_callback(statements.append)
+                    await conn.exec_driver_sql("CREATE TABLE t (x INTEGER)")
+                    await conn.exec_driver_sql("SELECT count(*) FROM t")
+                    await conn.exec_driver_sql("INSERT INTO t VALUES (1)")
+                    await conn.commit()
+            finally:
+                await engine.dispose()
+            return statements
+
+        statements = asyncio.run(run())
+        # Reads run outside a transaction; the write lock is taken when the first write begins one
+        assert statements.index("BEGIN IMMEDIATE") == statements.index("INSERT INTO t VALUES (1)") - 1
+
+
+class TestMultiWorker:
+    def test_user_changes_reach_other_processes(self, client):
+        from utils.firebase_auth import check_user_cache_epoch, invalidate_user
+
+        async def check():
+            async with TestSessionLocal() as db:
+                await check_user_cache_epoch(db)
+
+        async def invalidate_elsewhere():
+            # As another worker would: its own cache, a shared database
+            async with TestSessionLocal() as db:
+                await invalidate_user(db, "someone-else")
+                await db.commit()
+
+        asyncio.run(check())
+        client.post("/auth/google-login", json={"id_token": "mock"})
+        assert len(user_cache) == 1
+        asyncio.run(check())
+        assert len(user_cache) == 1
+
+        asyncio.run(invalidate_elsewhere())
+        asyncio.run(check())
+        assert len(user_cache) == 0
+
+    def test_snapshot_read_before_a_clear_is_not_cached(self, client):
+        client.post("/auth/google-login", json={"id_token": "mock"})
+        user_cache.clear()
+
+        # An epoch poll clearing the cache while the users row is being read
+        def clear_cache(*args):
+            user_cache.clear()
+
+        event.listen(test_engine.sync_engine, "after_cursor_execute", clear_cache, once=True)
+        assert client.get("/auth/me").status_code == 200
+        assert len(user_cache) == 0
+        client.get("/auth/me")
+        assert len(user_cache) == 1
+
+    def test_write_after_deletion_elsewhere_is_rejected(self, client):
+        from models import PrayerLog, User
+        client.post("/auth/google-login", json={"id_token": "mock"})
+
+        async def delete_elsewhere():
+            async with TestSessionLocal() as db:
+                await db.execute(delete(User))
+                await db.commit()
+
+        asyncio.run(delete_elsewhere())
+        # This process still has the user cached
+        response = client.post("/logs/", json={"date": "2026-02-19", "fajr_fardh": True})
+        assert response.status_code == 401
+
+        async def count_logs():
+            async with TestSessionLocal() as db:
+                return len((await db.scalars(select(PrayerLog))).all())
+
+        assert asyncio.run(count_logs()) == 0
+        assert len(user_cache) == 0
+
+
+class TestStartup:
+    def test_lazy_startup_defers_firebase(self, monkeypatch):
+        from config import settings
+        from utils import firebase_auth as fa
+        monkeypatch.setattr(settings, "LAZY_STARTUP", True)
+        monkeypatch.setattr(fa, "_firebase_init_attempted", False)
+
+        with TestClient(app) as client:
+            assert fa._firebase_init_attempted is False
+            assert client.get("/auth/me").status_code == 200
+            assert fa._firebase_init_attempted is True
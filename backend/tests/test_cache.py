@@ -0,0 +1,57 @@
+"""Tests for the in-process TTL cache."""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from utils.cache import TTLCache
+
+
+def test_hit_and_miss_counters():
+    cache = TTLCache(maxsize=4)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entries_are_dropped():
+    cache = TTLCache(maxsize=4)
+    cache.set("a", 1, expires_at=time.time() - 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_default_ttl():
+    cache = TTLCache(maxsize=4, ttl=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_invalidate():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+
+
+def test_set_after_invalidation_is_dropped():
+    cache = TTLCache(maxsize=2)
+    generation = cache.generation
+    cache.clear()
+    cache.set("a", 1, generation=generation)
+    assert cache.get("a") is None
+    cache.set("a", 2, generation=cache.generation)
+    assert cache.get("a") == 2
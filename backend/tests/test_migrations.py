@@ -0,0 +1,92 @@
+"""Tests for the Alembic migrations in migrations/versions."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from datetime import date
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, func, insert, inspect, select
+from database import Base
+from models import MonthlyRollup, PrayerLog, User
+from utils.schema import (
+    SCHEMA_REVISION, alembic_config, current_revision, downgrade_database, upgrade_database,
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_schema_revision_is_head():
+    script = ScriptDirectory.from_config(alembic_config())
+    assert script.get_current_head() == SCHEMA_REVISION
+
+
+def test_fresh_database_matches_models(engine):
+    with engine.connect() as conn:
+        upgrade_database(connection=conn)
+    with engine.connect() as conn:
+        assert current_revision(conn) == SCHEMA_REVISION
+        diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+        # compare_metadata does not look at primary keys
+        primary_keys = {
+            table.name: inspect(conn).get_pk_constraint(table.name)["constrained_columns"]
+            for table in Base.metadata.sorted_tables
+        }
+    assert diff == []
+    assert primary_keys == {
+        table.name: [col.name for col in table.primary_key] for table in Base.metadata.sorted_tables
+    }
+
+
+def test_upgrades_database_created_without_migrations(engine):
+    # A database made by create_all before versioned migrations, with data
+    Base.metadata.create_all(engine, tables=[User.__table__, PrayerLog.__table__])
+    with engine.begin() as conn:
+        conn.execute(insert(User).values(id="u1", google_id="g1", change_seq=0))
+        conn.execute(insert(PrayerLog), [
+            {"id": f"l{day}", "user_id": "u1", "date": date(2026, 1, day),
+             "fajr_fardh": True, "dhuhr_fardh": True, "asr_fardh": True,
+             "maghrib_fardh": True, "isha_fardh": day == 2, "daily_score": 50.0, "change_seq": 0}
+            for day in (1, 2)
+        ])
+        assert current_revision(conn) is None
+
+    with engine.connect() as conn:
+        upgrade_database(connection=conn)
+
+    with engine.connect() as conn:
+        assert current_revision(conn) == SCHEMA_REVISION
+        rollup = conn.execute(select(MonthlyRollup)).one()
+        assert (rollup.logged_days, rollup.score_hundredths, rollup.fardh_completed) == (2, 10000, 9)
+        user = conn.execute(select(User)).one()
+        assert (user.streak_start, user.longest_streak, user.full_fardh_days) == (date(2026, 1, 2), 1, 1)
+        assert conn.scalar(select(func.count()).select_from(PrayerLog)) == 2
+
+
+def test_downgrade_restores_the_id_primary_key(engine):
+    with engine.connect() as conn:
+        upgrade_database(connection=conn)
+    with engine.begin() as conn:
+        conn.execute(insert(User).values(id="u1", google_id="g1", change_seq=0))
+        conn.execute(insert(PrayerLog).values(id="l1", user_id="u1", date=date(2026, 1, 1)))
+
+    with engine.connect() as conn:
+        downgrade_database("0009", connection=conn)
+    with engine.connect() as conn:
+        assert current_revision(conn) == "0009"
+        assert inspect(conn).get_pk_constraint("prayer_logs")["constrained_columns"] == ["id"]
+        assert conn.scalar(select(func.count()).select_from(PrayerLog)) == 1
+
+    with engine.connect() as conn:
+        upgrade_database(connection=conn)
+    with engine.connect() as conn:
+        assert inspect(conn).get_pk_constraint("prayer_logs")["constrained_columns"] == ["id", "date"]
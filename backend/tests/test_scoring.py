@@ -2,9 +2,20 @@
 
 import sys
 import os
+import random
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from utils.scoring import compute_daily_score, TOTAL_EXPECTED_SUNNAH
+import pytest
+from utils import scoring
+from utils.scoring import (
+    PRAYERS,
+    RAKAT_FIELDS,
+    compute_daily_score,
+    compute_daily_scores,
+    compute_scores_from_logs,
+    fardh_mask,
+    TOTAL_EXPECTED_SUNNAH,
+)
 
 
 def test_all_fardh_no_sunnah():
@@ -84,3 +95,56 @@ def test_nafl_contributes():
 def test_expected_sunnah_total():
     """Verify expected sunnah total is 14."""
     assert TOTAL_EXPECTED_SUNNAH == 14
+
+
+def _random_logs(n, seed):
+    rng = random.Random(seed)
+    logs = []
+    for _ in range(n):
+        log = {f"{prayer}_fardh": rng.random() < 0.8 for prayer in PRAYERS}
+        log.update({field: rng.choice([0, 0, 1, 2, 4, 6, 12]) for field in RAKAT_FIELDS})
+        logs.append(log)
+    return logs
+
+
+@pytest.fixture(params=["numpy", "pure-python"])
+def batch_backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(scoring, "np", None)
+    return request.param
+
+
+def test_batch_matches_scalar_on_random_inputs(batch_backend):
+    """Batch scores are bit-identical to the scalar function."""
+    for seed in range(5):
+        logs = _random_logs(2000, seed)
+        masks = [fardh_mask(log) for log in logs]
+        rakats = [[log[field] for field in RAKAT_FIELDS] for log in logs]
+        expected = [compute_daily_score(**log) for log in logs]
+        assert compute_daily_scores(masks, rakats) == expected
+        assert compute_scores_from_logs(logs) == expected
+
+
+def test_batch_covers_every_fardh_and_rakat_combination(batch_backend):
+    masks, rakats, expected = [], [], []
+    for mask in range(1 << len(PRAYERS)):
+        for total in range(TOTAL_EXPECTED_SUNNAH + 5):
+            row = [0] * len(RAKAT_FIELDS)
+            row[total % len(RAKAT_FIELDS)] = total
+            log = {f"{p}_fardh": bool(mask >> i & 1) for i, p in enumerate(PRAYERS)}
+            log.update(zip(RAKAT_FIELDS, row))
+            masks.append(mask)
+            rakats.append(row)
+            expected.append(compute_daily_score(**log))
+    assert compute_daily_scores(masks, rakats) == expected
+
+
+def test_batch_empty(batch_backend):
+    assert compute_daily_scores([], []) == []
+
+
+def test_batch_rejects_negative_rakats(batch_backend):
+    with pytest.raises(ValueError):
+        compute_daily_scores([0], [[-1] + [0] * (len(RAKAT_FIELDS) - 1)])
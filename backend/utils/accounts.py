@@ -0,0 +1,57 @@
+"""Account deletion with chunked, set-based DELETEs.
+
+A user's rows are deleted ``DELETE_CHUNK_SIZE`` at a time, each chunk in its
+own short transaction, so neither memory nor the time the write lock is held
+grows with the length of the user's history. The users row goes last; one
+more pass afterwards removes anything a concurrent write added meanwhile
+(SQLite does not enforce the ON DELETE CASCADE foreign keys).
+"""
+
+import logging
+from sqlalchemy import and_, delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from models import MonthlyRollup, PrayerLog, SyncOperation, User
+
+logger = logging.getLogger(__name__)
+
+DELETE_CHUNK_SIZE = 5000
+
+# Per-user tables and the column that, with user_id, is unique in each
+_USER_TABLES = (
+    (PrayerLog, PrayerLog.date),
+    (MonthlyRollup, MonthlyRollup.month),
+    (SyncOperation, SyncOperation.operation_id),
+)
+
+
+async def _delete_rows(session_factory: async_sessionmaker, user_id: str) -> int:
+    deleted = 0
+    for model, key in _USER_TABLES:
+        while True:
+            chunk = (
+                select(key).where(model.user_id == user_id)
+                .order_by(key).limit(DELETE_CHUNK_SIZE).scalar_subquery()
+            )
+            async with session_factory() as db:
+                result = await db.execute(
+                    delete(model).where(and_(model.user_id == user_id, key.in_(chunk))),
+                    execution_options={"synchronize_session": False},
+                )
+                await db.commit()
+            deleted += result.rowcount
+            if result.rowcount < DELETE_CHUNK_SIZE:
+                break
+    return deleted
+
+
+async def delete_user_data(session_factory: async_sessionmaker, user_id: str) -> None:
+    """Delete a user and everything stored for them."""
+    deleted = await _delete_rows(session_factory, user_id)
+    async with session_factory() as db:
+        await db.execute(
+            delete(User).where(User.id == user_id),
+            execution_options={"synchronize_session": False},
+        )
+        await db.commit()
+    deleted += await _delete_rows(session_factory, user_id)
+    logger.info(f"Deleted account {user_id} and {deleted} row(s) of its data.")
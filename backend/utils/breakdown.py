@@ -0,0 +1,38 @@
+"""Per-prayer completion and rakat totals over a date range.
+
+Everything is summed by the database in one aggregate query over the user's
+logs in the range; no rows are loaded into Python.
+"""
+
+from datetime import date
+from sqlalchemy import Integer, and_, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import PrayerLog
+from utils.scoring import PRAYERS, RAKAT_FIELDS
+
+# Summed columns, in query order: each prayer's fardh, then every rakat field
+BREAKDOWN_FIELDS = tuple(f"{prayer}_fardh" for prayer in PRAYERS) + RAKAT_FIELDS
+
+
+async def breakdown_totals(
+    db: AsyncSession, user_id: str, start: date, end: date
+) -> tuple[int, dict[str, int]]:
+    """Return ``(logged_days, totals)`` for a date range.
+
+    ``totals`` maps each of ``BREAKDOWN_FIELDS`` to its sum; for the fardh
+    fields that is the number of days the prayer was completed.
+    """
+    sums = [
+        func.coalesce(func.sum(
+            cast(getattr(PrayerLog, field), Integer)
+            if field.endswith("_fardh") else getattr(PrayerLog, field)
+        ), 0)
+        for field in BREAKDOWN_FIELDS
+    ]
+    result = await db.execute(
+        select(func.count(), *sums).where(
+            and_(PrayerLog.user_id == user_id, PrayerLog.date >= start, PrayerLog.date <= end)
+        )
+    )
+    logged_days, *totals = result.one()
+    return logged_days, dict(zip(BREAKDOWN_FIELDS, totals))
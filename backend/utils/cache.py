@@ -0,0 +1,76 @@
+"""Small in-process caches shared by the request hot paths."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire at a given wall-clock time.
+
+    Safe to use from the event loop and from threadpool workers at once.
+    ``hits`` and ``misses`` count lookups since the cache was created.
+    ``generation`` goes up on every ``invalidate`` and ``clear``; pass the value
+    read before loading an entry to ``set`` so that an entry loaded before an
+    invalidation is not stored after it.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        expires_at: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        """Store a value until ``expires_at`` (epoch seconds), or for ``ttl`` seconds.
+
+        With ``generation``, nothing is stored if the cache was invalidated since.
+        """
+        if expires_at is None:
+            expires_at = time.time() + (self.ttl if self.ttl is not None else float("inf"))
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self.generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
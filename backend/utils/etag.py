@@ -0,0 +1,76 @@
+"""Conditional GET support for read endpoints derived from a user's prayer logs.
+
+Every prayer log write bumps ``User.change_seq``, so the pair (user id,
+change_seq) identifies the state of everything those endpoints return. A
+matching ``If-None-Match`` is answered with 304 before the endpoint loads or
+serializes any rows. Endpoints whose output also depends on something other
+than the logs, like the current date, add it to the ETag with ``check_etag_on``.
+"""
+
+from typing import Any, Callable
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_read_db
+from models import User
+from utils.firebase_auth import get_current_user
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match header value."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+async def read_fresh(db: AsyncSession, user: User, *columns) -> Row:
+    """Read ``columns`` of ``user``'s row from the database.
+
+    The cached user snapshot may predate the latest write, so columns that
+    writes change must be read fresh.
+    """
+    return (await db.execute(select(*columns).where(User.id == user.id))).one()
+
+
+async def _check_etag(
+    request: Request, response: Response, current_user: User, db: AsyncSession, *key_parts: str
+) -> None:
+    (change_seq,) = await read_fresh(db, current_user, User.change_seq)
+    etag = 'W/"{}"'.format("-".join([current_user.id, str(change_seq), *key_parts]))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
+async def check_etag(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> None:
+    """Route dependency: set the ETag, or short-circuit with 304 Not Modified."""
+    await _check_etag(request, response, current_user, db)
+
+
+def check_etag_on(dependency: Callable[..., Any]):
+    """Like ``check_etag``, for responses that also depend on ``dependency``'s value.
+
+    For example the current streak changes at midnight without any write.
+    """
+    async def check(
+        request: Request,
+        response: Response,
+        key: Any = Depends(dependency),
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_read_db),
+    ) -> None:
+        await _check_etag(request, response, current_user, db, str(key))
+
+    return check
@@ -5,71 +5,149 @@ Falls back to a mock mode for local development without Firebase.
 """
 
 import os
+import asyncio
+import hashlib
 import logging
+import threading
+import time
+from datetime import datetime
 from typing import Optional
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from database import AsyncReadSessionLocal, dialect_insert, get_db
 from config import settings
-from models import User
+from models import CacheEpoch, User, generate_uuid
+from utils.cache import TTLCache
+from utils.metrics import record_token_verification
 
 logger = logging.getLogger(__name__)
 
 security = HTTPBearer(auto_error=False)
 
-# Try to initialize Firebase Admin SDK
+# Firebase Admin SDK state, set by init_firebase()
 _firebase_initialized = False
-try:
-    import firebase_admin
-    from firebase_admin import auth as firebase_auth, credentials
-
-    cred_path = settings.FIREBASE_CREDENTIALS_PATH
-    # Make path absolute if it's relative
-    if cred_path and not os.path.isabs(cred_path):
-        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        cred_path = os.path.join(backend_dir, cred_path)
-
-    if cred_path and os.path.exists(cred_path):
-        # File exists — load credentials from the file path
-        cred = credentials.Certificate(cred_path)
-        firebase_admin.initialize_app(cred)
-        _firebase_initialized = True
-        logger.info(f"Firebase Admin SDK initialized successfully using file: {cred_path}")
-    elif settings.FIREBASE_CREDENTIALS_PATH:
-        # File not found — treat the env var value itself as the JSON content
-        import json
-        cred_dict = json.loads(settings.FIREBASE_CREDENTIALS_PATH)
-        cred = credentials.Certificate(cred_dict)
-        firebase_admin.initialize_app(cred)
-        _firebase_initialized = True
-        logger.info("Firebase Admin SDK initialized successfully using inline credentials.")
-    else:
-        logger.warning(
-            "FIREBASE_CREDENTIALS_PATH is not set. Running in MOCK auth mode."
-        )
-except Exception as e:
-    logger.warning(f"Firebase initialization failed: {e}. Running in MOCK auth mode.")
+_firebase_init_attempted = False
+_firebase_init_lock = threading.Lock()
+firebase_auth = None
+
+
+def init_firebase() -> bool:
+    """Import and initialize the Firebase Admin SDK once; return whether it is usable.
+
+    Called during startup, or with LAZY_STARTUP on the first request that
+    needs it, since importing firebase_admin is a large share of boot time.
+    Without credentials this falls back to mock mode.
+    """
+    global _firebase_initialized, _firebase_init_attempted, firebase_auth
+    with _firebase_init_lock:
+        if _firebase_init_attempted:
+            return _firebase_initialized
+        _firebase_init_attempted = True
+        try:
+            cred_path = settings.FIREBASE_CREDENTIALS_PATH
+            if not cred_path:
+                logger.warning(
+                    "FIREBASE_CREDENTIALS_PATH is not set. Running in MOCK auth mode."
+                )
+                return False
+
+            import firebase_admin
+            from firebase_admin import auth, credentials
+
+            # Make path absolute if it's relative
+            if not os.path.isabs(cred_path):
+                backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+                cred_path = os.path.join(backend_dir, cred_path)
+
+            if os.path.exists(cred_path):
+                # File exists — load credentials from the file path
+                cred = credentials.Certificate(cred_path)
+                firebase_admin.initialize_app(cred)
+                logger.info(f"Firebase Admin SDK initialized successfully using file: {cred_path}")
+            else:
+                # File not found — treat the env var value itself as the JSON content
+                import json
+                cred_dict = json.loads(settings.FIREBASE_CREDENTIALS_PATH)
+                cred = credentials.Certificate(cred_dict)
+                firebase_admin.initialize_app(cred)
+                logger.info("Firebase Admin SDK initialized successfully using inline credentials.")
+            firebase_auth = auth
+            _firebase_initialized = True
+        except Exception as e:
+            logger.warning(f"Firebase initialization failed: {e}. Running in MOCK auth mode.")
+        return _firebase_initialized
+
+
+# Verified token claims, keyed by token hash and kept until the token's `exp`
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE)
+
+# Detached User snapshots keyed by google_id
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+# CacheEpoch row bumped on every users row change, and the value user_cache matches
+USER_CACHE_EPOCH = "users"
+_user_cache_epoch: Optional[int] = None
+
+
+def _token_key(id_token: str) -> str:
+    return hashlib.sha256(id_token.encode()).hexdigest()
+
+
+def prefetch_signing_keys(force: bool = False) -> None:
+    """Fetch Google's ID token signing certificates into firebase_admin's HTTP cache.
+
+    firebase_admin caches the certificates according to their Cache-Control
+    headers; with ``force`` the cache is bypassed so the entry is renewed before
+    it expires and no request ever has to wait on the fetch.
+    """
+    if not _firebase_initialized:
+        return
+    from firebase_admin import _token_gen
+
+    # firebase_admin has no public hook for this; reuse the verifier's own request
+    request = firebase_auth._get_client(None)._token_verifier.request
+    headers = {"Cache-Control": "no-cache"} if force else None
+    request(_token_gen.ID_TOKEN_CERT_URI, headers=headers)
+
+
+async def refresh_signing_keys_forever() -> None:
+    """Background task: periodically renew the cached signing certificates."""
+    while True:
+        await asyncio.sleep(settings.SIGNING_KEY_REFRESH_SECONDS)
+        try:
+            await run_in_threadpool(prefetch_signing_keys, True)
+        except Exception as e:
+            logger.warning(f"Refreshing Firebase signing keys failed: {e}")
 
 
 def verify_firebase_token(id_token: str) -> dict:
     """Verify a Firebase ID token and return decoded claims.
 
-    In mock mode, returns a fake user for development.
+    Verified claims are added to ``token_cache``. In mock mode, returns a fake
+    user for development.
     """
-    if _firebase_initialized:
+    if init_firebase():
+        start = time.perf_counter()
         try:
             decoded = firebase_auth.verify_id_token(id_token)
-            return {
-                "uid": decoded["uid"],
-                "email": decoded.get("email"),
-                "name": decoded.get("name"),
-            }
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Invalid Firebase token: {str(e)}"
             )
+        finally:
+            record_token_verification(time.perf_counter() - start)
+        user_info = {
+            "uid": decoded["uid"],
+            "email": decoded.get("email"),
+            "name": decoded.get("name"),
+        }
+        token_cache.set(_token_key(id_token), user_info, expires_at=decoded["exp"])
+        return user_info
     else:
         # Mock mode for development
         return {
@@ -81,15 +159,22 @@ def verify_firebase_token(id_token: str) -> dict:
 
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
     """FastAPI dependency: extract and verify the current user from the Authorization header.
 
     In mock mode (no Firebase), returns/creates a default dev user.
     """
+    if not _firebase_init_attempted:
+        # Deferred by LAZY_STARTUP; the import is slow, so keep it off the event loop
+        await run_in_threadpool(init_firebase)
+
     if credentials:
         token = credentials.credentials
-        user_info = verify_firebase_token(token)
+        user_info = token_cache.get(_token_key(token)) if _firebase_initialized else None
+        if user_info is None:
+            # Verification may fetch Google's signing keys; keep it off the event loop
+            user_info = await run_in_threadpool(verify_firebase_token, token)
     elif not _firebase_initialized:
         # Mock mode: no token required
         user_info = verify_firebase_token("")
@@ -99,16 +184,81 @@ async def get_current_user(
             detail="Authorization header required"
         )
 
-    # Find or create user
-    user = db.query(User).filter(User.google_id == user_info["uid"]).first()
+    return await resolve_user(db, user_info)
+
+
+def _snapshot(user: User) -> User:
+    """Copy a loaded User into a detached instance that can be shared between requests."""
+    snapshot = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+async def invalidate_user(db: AsyncSession, google_id: str) -> None:
+    """Drop a cached user in every process; call in the transaction that changes the users row.
+
+    This process drops it at once. The others clear their user cache when they
+    next see the bumped epoch (see ``check_user_cache_epoch``); users rows change
+    rarely, so clearing the whole cache is cheaper than tracking which users.
+    """
+    insert = dialect_insert(db)
+    stmt = insert(CacheEpoch).values(name=USER_CACHE_EPOCH, epoch=1)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[CacheEpoch.name], set_={"epoch": CacheEpoch.epoch + 1},
+    ))
+    user_cache.invalidate(google_id)
+
+
+async def check_user_cache_epoch(db: AsyncSession) -> None:
+    """Clear ``user_cache`` if a users row changed, in any process, since the last check."""
+    global _user_cache_epoch
+    epoch = await db.scalar(select(CacheEpoch.epoch).where(CacheEpoch.name == USER_CACHE_EPOCH))
+    if epoch != _user_cache_epoch:
+        user_cache.clear()
+        _user_cache_epoch = epoch
+
+
+async def watch_user_cache_epoch_forever() -> None:
+    """Background task: check the user cache epoch every USER_CACHE_EPOCH_POLL_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.USER_CACHE_EPOCH_POLL_SECONDS)
+        try:
+            async with AsyncReadSessionLocal() as db:
+                await check_user_cache_epoch(db)
+        except Exception as e:
+            logger.warning(f"Checking the user cache epoch failed: {e}")
+
+
+async def resolve_user(db: AsyncSession, user_info: dict) -> User:
+    """Return the User for verified token claims, creating it on first sighting.
+
+    Cache hits are merged into ``db`` without a query. New users are created
+    with a single INSERT ... ON CONFLICT (google_id) DO UPDATE ... RETURNING, so
+    parallel first requests converge on the same row instead of racing.
+    """
+    google_id = user_info["uid"]
+    snapshot = user_cache.get(google_id)
+    if snapshot is not None:
+        return await db.merge(snapshot, load=False)
+
+    # A clear from an epoch bump while the row is read must win over this snapshot
+    generation = user_cache.generation
+    user = await db.scalar(select(User).where(User.google_id == google_id))
     if not user:
-        user = User(
-            google_id=user_info["uid"],
+        insert = dialect_insert(db)
+        stmt = insert(User).values(
+            id=generate_uuid(),
+            google_id=google_id,
             email=user_info.get("email"),
             display_name=user_info.get("name"),
+            created_at=datetime.utcnow(),
         )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.google_id],
+            set_={"google_id": stmt.excluded.google_id},
+        ).returning(User)
+        user = await db.scalar(stmt, execution_options={"populate_existing": True})
+        await db.commit()
 
+    user_cache.set(google_id, _snapshot(user), generation=generation)
     return user
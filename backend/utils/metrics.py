@@ -0,0 +1,211 @@
+"""In-process request and database metrics, exported in Prometheus text format.
+
+``MetricsMiddleware`` times each request and attributes the SQL statements it
+runs (counted by the cursor hooks ``instrument_engine`` installs) to the
+matched route. Connection pool checkout waits and Firebase token verification
+are timed separately, so slow requests can be pinned on auth, the database or
+everything else (mostly serialization).
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+@dataclass
+class RequestStats:
+    """Database work attributed to the request currently being handled."""
+
+    queries: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    auth_seconds: float = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Per-bucket counts (plus +Inf), sum
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        for label_values, counts, total in sorted(snapshot):
+            labels = "".join(
+                f'{name}="{value}",' for name, value in zip(self.labels, label_values)
+            )
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+            labels = "{" + labels.rstrip(",") + "}" if labels else ""
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+REQUEST_DURATION = Histogram(
+    "salah_request_duration_seconds", "Request latency by route.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "salah_request_db_queries", "SQL statements executed per request.",
+    ("method", "route"), QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "salah_request_db_duration_seconds", "Time spent executing SQL per request.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+POOL_WAIT = Histogram(
+    "salah_db_pool_checkout_seconds", "Time to check a connection out of the pool.",
+    (), LATENCY_BUCKETS,
+)
+TOKEN_VERIFICATION = Histogram(
+    "salah_firebase_verification_seconds", "Firebase ID token verification time.",
+    (), LATENCY_BUCKETS,
+)
+METRICS = (REQUEST_DURATION, REQUEST_QUERIES, REQUEST_DB_DURATION, POOL_WAIT, TOKEN_VERIFICATION)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+def record_token_verification(seconds: float) -> None:
+    TOKEN_VERIFICATION.observe(seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.auth_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attribute the SQL statements ``engine`` runs to the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def timed_pool(pool_class: type[Pool]) -> type[Pool]:
+    """Subclass ``pool_class`` to record how long each connection checkout takes.
+
+    The time includes opening a new connection when the pool has none idle.
+    """
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                elapsed = time.perf_counter() - start
+                POOL_WAIT.observe(elapsed)
+                stats = _current.get()
+                if stats is not None:
+                    stats.pool_wait_seconds += elapsed
+
+    # Keep the pool's identity: SQLAlchemy names the pool's logger after its class
+    TimedPool.__name__ = TimedPool.__qualname__ = pool_class.__name__
+    TimedPool.__module__ = pool_class.__module__
+    return TimedPool
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request up to its last body chunk.
+
+    Requests are labelled by route template (``/logs/{log_date}``), never by the
+    raw path, to keep the number of series bounded. Requests slower than
+    ``SLOW_REQUEST_MS`` are logged with their query count and DB time.
+    """
+
+    def __init__(self, app, exclude: tuple[str, ...] = ()):
+        self.app = app
+        self.exclude = exclude
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            async def send_wrapper(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._record(scope, stats, time.perf_counter() - start, status_code)
+
+    @staticmethod
+    def _record(scope, stats: RequestStats, elapsed: float, status_code: int) -> None:
+        route = scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        method = scope["method"]
+        REQUEST_DURATION.observe(elapsed, method, path)
+        REQUEST_QUERIES.observe(stats.queries, method, path)
+        REQUEST_DB_DURATION.observe(stats.db_seconds, method, path)
+        if elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+            logger.warning(
+                f"Slow request: {method} {path} -> {status_code} took {elapsed * 1000:.0f} ms "
+                f"({stats.queries} queries, {stats.db_seconds * 1000:.0f} ms in DB, "
+                f"{stats.pool_wait_seconds * 1000:.0f} ms waiting for a connection, "
+                f"{stats.auth_seconds * 1000:.0f} ms verifying the token)"
+            )
@@ -0,0 +1,56 @@
+"""Helpers for Alembic revisions in ``migrations/versions``.
+
+Revisions guard each step with ``has_table``/``has_column``/``has_index`` so
+they also upgrade databases that were created by ``create_all`` or the old
+one-off scripts before versioned migrations existed.
+"""
+
+from typing import Callable, Sequence
+from alembic import op
+from sqlalchemy import inspect, select
+from sqlalchemy.engine import Connection
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def has_table(table: str) -> bool:
+    return inspect(op.get_bind()).has_table(table)
+
+
+def has_column(table: str, column: str) -> bool:
+    return any(col["name"] == column for col in inspect(op.get_bind()).get_columns(table))
+
+
+def has_index(table: str, index: str) -> bool:
+    return any(ix["name"] == index for ix in inspect(op.get_bind()).get_indexes(table))
+
+
+def backfill_in_batches(
+    key,
+    pending,
+    apply: Callable[[Connection, Sequence], None],
+    batch_size: int = BACKFILL_BATCH_SIZE,
+) -> int:
+    """Run a data migration over a large table in small, separately committed batches.
+
+    ``key`` is a unique, ordered column and ``pending`` a WHERE clause matching
+    the rows that still need work. Each batch of at most ``batch_size`` keys is
+    handed to ``apply(conn, keys)`` and committed on its own, so write locks are
+    held for one batch rather than the whole run. Because ``pending`` excludes
+    finished rows, re-running an interrupted upgrade picks up where it stopped.
+    Returns the number of keys processed.
+    """
+    conn = op.get_bind()
+    processed = 0
+    last = None
+    with op.get_context().autocommit_block():
+        while True:
+            query = select(key).where(pending).order_by(key).limit(batch_size)
+            if last is not None:
+                query = query.where(key > last)
+            keys = conn.execute(query).scalars().all()
+            if not keys:
+                return processed
+            apply(conn, keys)
+            processed += len(keys)
+            last = keys[-1]
@@ -0,0 +1,94 @@
+"""Yearly range partitions of prayer_logs on PostgreSQL.
+
+On PostgreSQL ``prayer_logs`` is partitioned by ``RANGE (date)``, one
+partition per calendar year, plus a default partition for dates outside every
+yearly one. Range reads only touch the years they cover, and each partition's
+indexes stay as small as one year of data, however long the history grows.
+
+Partitions must exist before rows for their year arrive; a row that lands in
+the default partition blocks creating its year's partition later. So every
+year from ``FIRST_YEAR`` on gets one when the table is partitioned (migration
+0010, or ``create_all``), and startup creates any missing ones up to
+``PG_PARTITION_YEARS_AHEAD`` years ahead (see ``ensure_partitions``). SQLite
+tables are not partitioned.
+"""
+
+import logging
+from datetime import date
+from typing import Iterable
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+TABLE = "prayer_logs"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+# Earliest year with its own partition; older dates go to the default partition
+FIRST_YEAR = 2015
+
+
+def partition_name(year: int) -> str:
+    return f"{TABLE}_{year}"
+
+
+def partition_years() -> range:
+    """Every year from FIRST_YEAR to PG_PARTITION_YEARS_AHEAD years from now."""
+    return range(FIRST_YEAR, date.today().year + settings.PG_PARTITION_YEARS_AHEAD + 1)
+
+
+def is_partitioned(conn: Connection, table: str = TABLE) -> bool:
+    return conn.scalar(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    ) == "p"
+
+
+def existing_partitions(conn: Connection, table: str = TABLE) -> set[str]:
+    return set(conn.scalars(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    ))
+
+
+def create_partitions(conn: Connection, years: Iterable[int]) -> list[int]:
+    """Create the default partition and the yearly ones in ``years`` that are missing.
+
+    Runs in the caller's transaction. Returns the years created.
+    """
+    existing = existing_partitions(conn)
+    if DEFAULT_PARTITION not in existing:
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+    created = []
+    for year in years:
+        if partition_name(year) in existing:
+            continue
+        conn.execute(text(
+            f"CREATE TABLE {partition_name(year)} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        ))
+        created.append(year)
+    return created
+
+
+def ensure_partitions(conn: Connection) -> None:
+    """Startup: create this year's partition and the next PG_PARTITION_YEARS_AHEAD.
+
+    Each year is created in its own savepoint, so one failure (another worker
+    created it first, or the default partition already holds rows for that
+    year) is logged and does not stop the others.
+    """
+    if not is_partitioned(conn):
+        return
+    for year in partition_years()[-(settings.PG_PARTITION_YEARS_AHEAD + 1):]:
+        try:
+            with conn.begin_nested():
+                if create_partitions(conn, [year]):
+                    logger.info(f"Created partition {partition_name(year)}.")
+        except Exception as e:
+            logger.warning(f"Could not create partition {partition_name(year)}: {e}")
+    conn.commit()
@@ -0,0 +1,144 @@
+"""Monthly rollups of prayer logs.
+
+``MonthlyRollup`` keeps per-user, per-month totals so that performance over any
+range costs O(months) instead of O(days). The upsert path keeps the rollups
+current by applying the difference between each log's old and new values;
+``rebuild_statement`` recomputes them from ``prayer_logs`` (see
+``rebuild_rollups.py``).
+"""
+
+from datetime import date, timedelta
+from sqlalchemy import Date, Integer, and_, cast, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import dialect_insert
+from models import FARDH_PER_DAY, MonthlyRollup, PrayerLog
+
+_TOTAL_COLUMNS = ("logged_days", "score_hundredths", "fardh_completed")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (month_start(day) + timedelta(days=32)).replace(day=1)
+
+
+def to_hundredths(score: float) -> int:
+    """Convert a two-decimal daily score to an exact integer count of hundredths."""
+    return round(score * 100)
+
+
+def month_start_sql(column, dialect_name: str):
+    """SQL expression truncating a date column to the first day of its month."""
+    if dialect_name == "postgresql":
+        return cast(func.date_trunc("month", column), Date)
+    return func.date(column, "start of month")
+
+
+async def apply_log_deltas(
+    db: AsyncSession,
+    user_id: str,
+    old: dict[date, tuple[int, int]],
+    new: dict[date, tuple[int, int]],
+) -> None:
+    """Fold the change from ``old`` to ``new`` log values into the user's rollups.
+
+    Both map a log date to ``(score_hundredths, fardh_completed)``. Dates in
+    ``new`` but not in ``old`` are newly logged days. All affected months are
+    written with a single INSERT ... ON CONFLICT DO UPDATE that adds the deltas.
+    """
+    deltas: dict[date, list[int]] = {}
+    for day, (score, fardh) in new.items():
+        if day in old:
+            logged, old_score, old_fardh = 0, *old[day]
+        else:
+            logged, old_score, old_fardh = 1, 0, 0
+        month = deltas.setdefault(month_start(day), [0, 0, 0])
+        month[0] += logged
+        month[1] += score - old_score
+        month[2] += fardh - old_fardh
+
+    rows = [
+        {"user_id": user_id, "month": month, **dict(zip(_TOTAL_COLUMNS, totals))}
+        for month, totals in deltas.items()
+        if any(totals)
+    ]
+    if not rows:
+        return
+
+    insert = dialect_insert(db)
+    stmt = insert(MonthlyRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MonthlyRollup.user_id, MonthlyRollup.month],
+        set_={col: getattr(MonthlyRollup, col) + stmt.excluded[col] for col in _TOTAL_COLUMNS},
+    )
+    await db.execute(stmt)
+
+
+async def performance_totals(
+    db: AsyncSession, user_id: str, start: date, end: date
+) -> tuple[int, float, int]:
+    """Return ``(logged_days, total_score, total_fardh)`` for a date range.
+
+    Whole months come from the rollups; the partial months at either edge of
+    the range (at most two) are aggregated from ``prayer_logs``.
+    """
+    first_full = start if start.day == 1 else next_month(start)
+    after_full = month_start(end + timedelta(days=1))
+
+    if first_full < after_full:
+        result = await db.execute(
+            select(
+                func.coalesce(func.sum(MonthlyRollup.logged_days), 0),
+                func.coalesce(func.sum(MonthlyRollup.score_hundredths), 0),
+                func.coalesce(func.sum(MonthlyRollup.fardh_completed), 0),
+            ).where(
+                and_(
+                    MonthlyRollup.user_id == user_id,
+                    MonthlyRollup.month >= first_full,
+                    MonthlyRollup.month < after_full,
+                )
+            )
+        )
+        logged_days, score_hundredths, total_fardh = result.one()
+        in_edges = or_(
+            and_(PrayerLog.date >= start, PrayerLog.date < first_full),
+            and_(PrayerLog.date >= after_full, PrayerLog.date <= end),
+        )
+    else:
+        logged_days, score_hundredths, total_fardh = 0, 0, 0
+        in_edges = and_(PrayerLog.date >= start, PrayerLog.date <= end)
+
+    result = await db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(PrayerLog.daily_score), 0.0),
+            func.coalesce(func.sum(FARDH_PER_DAY), 0),
+        ).where(and_(PrayerLog.user_id == user_id, in_edges))
+    )
+    edge_days, edge_score, edge_fardh = result.one()
+
+    return (
+        logged_days + edge_days,
+        score_hundredths / 100 + edge_score,
+        total_fardh + edge_fardh,
+    )
+
+
+def rebuild_statement(dialect_name: str):
+    """INSERT ... SELECT that recomputes every user's rollups from ``prayer_logs``.
+
+    Run it after deleting the existing rollup rows.
+    """
+    month = month_start_sql(PrayerLog.date, dialect_name)
+    totals = select(
+        PrayerLog.user_id,
+        month,
+        func.count(),
+        func.sum(cast(func.round(PrayerLog.daily_score * 100), Integer)),
+        func.sum(FARDH_PER_DAY),
+    ).group_by(PrayerLog.user_id, month)
+    return MonthlyRollup.__table__.insert().from_select(
+        ["user_id", "month", *_TOTAL_COLUMNS], totals
+    )
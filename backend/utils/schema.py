@@ -0,0 +1,48 @@
+"""Startup check of the database's migration revision.
+
+Startup reads the single row Alembic keeps in ``alembic_version`` and compares
+it with ``SCHEMA_REVISION`` instead of reflecting every table. Only an
+outdated database pays for loading Alembic and running the pending revisions.
+"""
+
+import os
+from typing import Optional
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+# Head revision in migrations/versions that the models match; bump it with every new revision
+SCHEMA_REVISION = "0010"
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def current_revision(conn: Connection) -> Optional[str]:
+    """The revision the database is at, or None if it has never been migrated."""
+    if not inspect(conn).has_table("alembic_version"):
+        return None
+    return conn.scalar(text("SELECT version_num FROM alembic_version"))
+
+
+def alembic_config(connection: Optional[Connection] = None):
+    """Alembic config for migrations/, optionally bound to an existing connection."""
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    config.attributes["configure_logger"] = False
+    config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_database(revision: str = "head", connection: Optional[Connection] = None) -> None:
+    """Apply pending migrations, as ``alembic upgrade head`` would."""
+    from alembic import command
+
+    command.upgrade(alembic_config(connection), revision)
+
+
+def downgrade_database(revision: str, connection: Optional[Connection] = None) -> None:
+    """Revert to an older revision, as ``alembic downgrade <revision>`` would."""
+    from alembic import command
+
+    command.downgrade(alembic_config(connection), revision)
@@ -5,8 +5,30 @@ Weighting:
   - Sunnah + Nafl + Witr = 15% of daily score
 
 Daily Score = (fardh_completed / 5) * 85 + min((sunnah_prayed / expected_sunnah) * 15, 15)
+
+``compute_daily_scores`` scores many days at once (vectorized with NumPy when it
+is installed) and is bit-identical to ``compute_daily_score``.
 """
 
+from collections.abc import Mapping
+from functools import partial
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the batch scorer falls back to pure Python
+    np = None
+
+PRAYERS = ("fajr", "dhuhr", "asr", "maghrib", "isha")
+
+# Column order of the rakat matrix taken by compute_daily_scores
+RAKAT_FIELDS = (
+    "fajr_sunnah", "fajr_nafl",
+    "dhuhr_sunnah", "dhuhr_nafl",
+    "asr_sunnah", "asr_nafl",
+    "maghrib_sunnah", "maghrib_nafl",
+    "isha_sunnah", "isha_nafl", "isha_witr",
+)
+
 # Expected Sunnah rakats per prayer (typical recommendation)
 EXPECTED_SUNNAH = {
     "fajr": 2,
@@ -105,3 +127,73 @@ def compute_score_from_log(log) -> float:
     else:
         # Dict-like (pass through, isha_witr defaults to 0 if missing)
         return compute_daily_score(**log)
+
+
+# The score depends only on the fardh count (0-5) and the rakat total, which
+# stops mattering once it reaches TOTAL_EXPECTED_SUNNAH. Every possible score is
+# therefore precomputed with the scalar function, which keeps the batch scorer
+# bit-identical to it.
+def _scalar_score(fardh_count: int, rakat_total: int) -> float:
+    fardh = {f"{prayer}_fardh": i < fardh_count for i, prayer in enumerate(PRAYERS)}
+    rakats = dict.fromkeys(RAKAT_FIELDS, 0)
+    rakats["fajr_sunnah"] = rakat_total
+    return compute_daily_score(**fardh, **rakats)
+
+
+_SCORE_TABLE = [
+    [_scalar_score(fardh, total) for total in range(TOTAL_EXPECTED_SUNNAH + 1)]
+    for fardh in range(len(PRAYERS) + 1)
+]
+_POPCOUNT = [bin(mask).count("1") for mask in range(1 << len(PRAYERS))]
+
+if np is not None:
+    _SCORE_TABLE_NP = np.array(_SCORE_TABLE, dtype=np.float64)
+    _POPCOUNT_NP = np.array(_POPCOUNT, dtype=np.intp)
+
+
+def _field_getter(log):
+    return log.get if isinstance(log, Mapping) else partial(getattr, log)
+
+
+def fardh_mask(log) -> int:
+    """Pack the five fardh flags of a log (mapping or ORM object) into a bitmask.
+
+    Bit ``i`` is set when ``PRAYERS[i]`` was prayed.
+    """
+    get = _field_getter(log)
+    return sum(1 << i for i, prayer in enumerate(PRAYERS) if get(f"{prayer}_fardh"))
+
+
+def compute_daily_scores(fardh_masks, rakats) -> list[float]:
+    """Score a block of days at once.
+
+    ``fardh_masks`` holds one bitmask per day (see ``fardh_mask``) and
+    ``rakats`` one row per day of non-negative rakat counts in ``RAKAT_FIELDS``
+    order. Uses NumPy when available; results are identical to calling
+    ``compute_daily_score`` on each day.
+    """
+    if np is not None:
+        masks = np.asarray(fardh_masks, dtype=np.intp)
+        counts = np.asarray(rakats, dtype=np.int64).reshape(len(masks), len(RAKAT_FIELDS))
+        if (counts < 0).any():
+            raise ValueError("Rakat counts must be non-negative")
+        totals = np.minimum(counts.sum(axis=1), TOTAL_EXPECTED_SUNNAH)
+        return _SCORE_TABLE_NP[_POPCOUNT_NP[masks & 0b11111], totals].tolist()
+
+    scores = []
+    for mask, row in zip(fardh_masks, rakats):
+        if min(row) < 0:
+            raise ValueError("Rakat counts must be non-negative")
+        total = min(sum(row), TOTAL_EXPECTED_SUNNAH)
+        scores.append(_SCORE_TABLE[_POPCOUNT[mask & 0b11111]][total])
+    return scores
+
+
+def compute_scores_from_logs(logs) -> list[float]:
+    """Batch-score a sequence of PrayerLog ORM objects or mappings."""
+    masks, rakats = [], []
+    for log in logs:
+        get = _field_getter(log)
+        masks.append(fardh_mask(log))
+        rakats.append([get(field) or 0 for field in RAKAT_FIELDS])
+    return compute_daily_scores(masks, rakats)
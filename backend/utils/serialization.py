@@ -0,0 +1,47 @@
+"""Fast JSON serialization for prayer log responses.
+
+The default path hands ORM objects to FastAPI, which validates every field
+through ``PrayerLogResponse`` and then JSON-encodes the result. Rows that come
+straight from the database are already well-typed, so with
+``Settings.FAST_JSON_RESPONSES`` enabled the routers select plain column tuples
+and encode them directly with orjson. The output is byte-for-byte what the
+default path produces.
+"""
+
+from typing import Optional
+
+import orjson
+from fastapi import Response
+from models import PrayerLog
+from schemas import PrayerLogResponse
+
+# Columns of PrayerLogResponse, in field order
+LOG_FIELDS = tuple(PrayerLogResponse.model_fields)
+LOG_COLUMNS = tuple(PrayerLog.__table__.c[name] for name in LOG_FIELDS)
+
+
+def log_rows_to_dicts(rows) -> list[dict]:
+    """Turn row tuples selected with ``LOG_COLUMNS`` into response dicts."""
+    return [dict(zip(LOG_FIELDS, row)) for row in rows]
+
+
+def logs_to_dicts(logs) -> list[dict]:
+    """Turn PrayerLog ORM objects into response dicts, skipping validation."""
+    return [{name: getattr(log, name) for name in LOG_FIELDS} for log in logs]
+
+
+def ndjson_line(content) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def json_response(content, response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """Encode ``content`` with orjson, keeping headers set on the injected ``response``.
+
+    FastAPI only copies those headers onto responses it builds itself.
+    """
+    return Response(
+        orjson.dumps(content),
+        status_code=status_code,
+        headers=dict(response.headers) if response is not None else None,
+        media_type="application/json",
+    )
@@ -0,0 +1,88 @@
+"""Performance over a date range split into day, week or month buckets.
+
+All buckets come from a single GROUP BY over the user's logs in the range,
+which the (user_id, date) index serves directly. Weeks start on Monday.
+"""
+
+from datetime import date, timedelta
+from typing import Literal
+from sqlalchemy import Date, and_, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import FARDH_PER_DAY, PrayerLog
+from utils.rollups import month_start, month_start_sql, next_month
+
+Bucket = Literal["day", "week", "month"]
+
+
+def bucket_start(day: date, bucket: Bucket) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return month_start(day)
+    return day
+
+
+def next_bucket(day: date, bucket: Bucket) -> date:
+    """First day of the bucket after the one starting on ``day``."""
+    if bucket == "week":
+        return day + timedelta(days=7)
+    if bucket == "month":
+        return next_month(day)
+    return day + timedelta(days=1)
+
+
+def bucket_start_sql(column, bucket: Bucket, dialect_name: str):
+    """SQL expression mapping a date column to the first day of its bucket."""
+    if bucket == "month":
+        if dialect_name == "postgresql":
+            return month_start_sql(column, dialect_name)
+        return func.date(column, "start of month", type_=Date)
+    if bucket == "week":
+        if dialect_name == "postgresql":
+            return cast(func.date_trunc("week", column), Date)
+        # Forward to Sunday (or stay on it), then back to that week's Monday
+        return func.date(column, "weekday 0", "-6 days", type_=Date)
+    return column
+
+
+def bucket_count(start: date, end: date, bucket: Bucket) -> int:
+    """Number of buckets overlapping ``start``..``end``."""
+    if bucket == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    if bucket == "week":
+        return (bucket_start(end, bucket) - bucket_start(start, bucket)).days // 7 + 1
+    return (end - start).days + 1
+
+
+async def performance_series(
+    db: AsyncSession, user_id: str, start: date, end: date, bucket: Bucket
+) -> list[tuple[date, date, int, float, int]]:
+    """Per-bucket ``(first_day, last_day, logged_days, total_score, total_fardh)``.
+
+    Every bucket overlapping ``start``..``end`` is returned in order, clipped to
+    the range, including buckets with nothing logged.
+    """
+    key = bucket_start_sql(PrayerLog.date, bucket, db.get_bind().dialect.name)
+    result = await db.execute(
+        select(
+            key,
+            func.count(),
+            func.coalesce(func.sum(PrayerLog.daily_score), 0.0),
+            func.coalesce(func.sum(FARDH_PER_DAY), 0),
+        )
+        .where(and_(PrayerLog.user_id == user_id, PrayerLog.date >= start, PrayerLog.date <= end))
+        .group_by(key)
+    )
+    totals = {row[0]: row[1:] for row in result}
+
+    series = []
+    day = bucket_start(start, bucket)
+    while day <= end:
+        following = next_bucket(day, bucket)
+        logged_days, total_score, total_fardh = totals.get(day, (0, 0.0, 0))
+        series.append((
+            max(day, start), min(following - timedelta(days=1), end),
+            logged_days, total_score, total_fardh,
+        ))
+        day = following
+    return series
@@ -0,0 +1,158 @@
+"""Streaks of full-fardh days, kept on ``User`` and maintained incrementally.
+
+A full-fardh day is a logged day with all five fardh prayers completed. Each
+user stores the latest run of consecutive full days (``streak_start`` ..
+``streak_end``), the longest run so far and the number of full days, so
+reading them is a primary-key lookup however long the history is.
+
+The upsert path passes in each day whose full-fardh status changed. Logging
+the day after the latest run (the normal case) is a pure state update. An edit
+to an earlier day rescans outward from that day only, in windows of
+``RESCAN_WINDOW`` days, until it finds a day that is not full. Un-marking a day
+inside the longest run is the one case that recomputes from the whole history,
+since the next-longest run could be anywhere.
+"""
+
+from datetime import date, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import and_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import FARDH_COLUMNS, FARDH_PER_DAY, PrayerLog, User
+
+# Days fetched per query when walking through a run
+RESCAN_WINDOW = 366
+
+STREAK_COLUMNS = (
+    "streak_start", "streak_end", "longest_streak", "longest_streak_end", "full_fardh_days",
+)
+
+_ONE_DAY = timedelta(days=1)
+
+
+def is_full_fardh(fardh_completed: int) -> bool:
+    return fardh_completed == len(FARDH_COLUMNS)
+
+
+def streak_state(full_days: Iterable[date]) -> dict:
+    """Compute the streak columns from every full-fardh day, in ascending order."""
+    state = dict.fromkeys(STREAK_COLUMNS)
+    state.update(longest_streak=0, full_fardh_days=0)
+    for day in full_days:
+        if state["streak_end"] is None or day != state["streak_end"] + _ONE_DAY:
+            state["streak_start"] = day
+        state["streak_end"] = day
+        state["full_fardh_days"] += 1
+        length = (day - state["streak_start"]).days + 1
+        if length > state["longest_streak"]:
+            state["longest_streak"] = length
+            state["longest_streak_end"] = day
+    return state
+
+
+def current_streak(streak_start: Optional[date], streak_end: Optional[date], today: date) -> int:
+    """Length of the latest run, or 0 if it ended before yesterday."""
+    if streak_end is None or streak_end < today - _ONE_DAY:
+        return 0
+    return (streak_end - streak_start).days + 1
+
+
+def _is_full(user_id: str):
+    return and_(PrayerLog.user_id == user_id, FARDH_PER_DAY == len(FARDH_COLUMNS))
+
+
+async def _full_days(db: AsyncSession, user_id: str, start: date, end: date) -> set[date]:
+    result = await db.scalars(
+        select(PrayerLog.date).where(
+            and_(_is_full(user_id), PrayerLog.date >= start, PrayerLog.date <= end)
+        )
+    )
+    return set(result)
+
+
+async def _walk(
+    db: AsyncSession, user_id: str, day: date, step: int, limit: Optional[date] = None
+) -> date:
+    """Last day of the run of full days that continues from ``day`` by ``step`` (±1).
+
+    Stops early at ``limit``. Returns ``day`` if its neighbour is not full.
+    """
+    one = _ONE_DAY * step
+    edge = day
+    while edge != limit:
+        window_end = edge + one * RESCAN_WINDOW
+        if limit is not None and (window_end - limit) * step > timedelta(0):
+            window_end = limit
+        full = await _full_days(db, user_id, min(edge + one, window_end), max(edge + one, window_end))
+        while edge != window_end and edge + one in full:
+            edge += one
+        if edge != window_end:
+            break
+    return edge
+
+
+async def _recompute(db: AsyncSession, user_id: str) -> dict:
+    result = await db.scalars(select(PrayerLog.date).where(_is_full(user_id)).order_by(PrayerLog.date))
+    return streak_state(result)
+
+
+async def apply_streak_changes(db: AsyncSession, user_id: str, changes: dict[date, bool]) -> None:
+    """Update a user's streak columns after the days in ``changes`` were written.
+
+    ``changes`` maps each day whose full-fardh status changed to its new status.
+    Call it in the writing transaction, after all rows are written, while the
+    user's ``change_seq`` bump holds other writers off.
+    """
+    if not changes:
+        return
+    row = (await db.execute(
+        select(*(getattr(User, col) for col in STREAK_COLUMNS)).where(User.id == user_id)
+    )).one()
+    state = dict(zip(STREAK_COLUMNS, row))
+    state["full_fardh_days"] += sum(1 if full else -1 for full in changes.values())
+
+    for day, full in sorted(changes.items()):
+        start, end = state["streak_start"], state["streak_end"]
+        longest, longest_end = state["longest_streak"], state["longest_streak_end"]
+
+        if full:
+            if end is None or day > end + _ONE_DAY:
+                run_start = run_end = day
+            elif day == end + _ONE_DAY:
+                run_start, run_end = start, day
+            else:
+                # An earlier day became full; it may join the runs on either side
+                run_start = await _walk(db, user_id, day, -1)
+                run_end = await _walk(db, user_id, day, 1, limit=start - _ONE_DAY)
+                if run_end + _ONE_DAY == start:
+                    run_end = end
+            if run_end >= (end or run_end):
+                state["streak_start"], state["streak_end"] = run_start, run_end
+            length = (run_end - run_start).days + 1
+            if length > longest:
+                state["longest_streak"], state["longest_streak_end"] = length, run_end
+            continue
+
+        if longest_end is not None and longest_end - timedelta(days=longest) < day <= longest_end:
+            # The longest run was broken; the next longest could be anywhere.
+            # The rows are already written, so this also covers the remaining changes.
+            state = await _recompute(db, user_id)
+            break
+        if end is None:
+            continue
+        if start <= day < end:
+            state["streak_start"] = day + _ONE_DAY
+        elif day == end:
+            if day > start:
+                state["streak_end"] = day - _ONE_DAY
+            else:
+                previous = await db.scalar(
+                    select(PrayerLog.date)
+                    .where(and_(_is_full(user_id), PrayerLog.date < day))
+                    .order_by(PrayerLog.date.desc()).limit(1)
+                )
+                state["streak_end"] = previous
+                state["streak_start"] = (
+                    await _walk(db, user_id, previous, -1) if previous is not None else None
+                )
+
+    await db.execute(update(User).where(User.id == user_id).values(**state))
@@ -0,0 +1,59 @@
+"""Replay store for /logs/sync batches sent with an ``operation_id``.
+
+Mobile clients resend a batch when the response is lost to a flaky
+connection. The first response is kept for ``SYNC_REPLAY_TTL_SECONDS`` under
+the batch's ``operation_id``, and a retry gets it back without re-running the
+upsert. Expired entries are pruned as the same user records new ones.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import and_, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import dialect_insert
+from models import SyncOperation
+
+
+def _cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=settings.SYNC_REPLAY_TTL_SECONDS)
+
+
+async def find_replay(db: AsyncSession, user_id: str, operation_id: str) -> Optional[bytes]:
+    """The stored response body of an earlier batch, if it has not expired."""
+    response = await db.scalar(
+        select(SyncOperation.response).where(
+            and_(
+                SyncOperation.user_id == user_id,
+                SyncOperation.operation_id == operation_id,
+                SyncOperation.created_at >= _cutoff(),
+            )
+        )
+    )
+    return response.encode() if response is not None else None
+
+
+async def remember_sync(db: AsyncSession, user_id: str, operation_id: str, body: bytes) -> None:
+    """Store a batch's response body for replay, pruning the user's expired entries.
+
+    If a concurrent retry of the same batch stored its response first, that one
+    is kept; both describe the same final state.
+    """
+    await db.execute(
+        delete(SyncOperation).where(
+            and_(SyncOperation.user_id == user_id, SyncOperation.created_at < _cutoff())
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    insert = dialect_insert(db)
+    await db.execute(
+        insert(SyncOperation)
+        .values(
+            user_id=user_id,
+            operation_id=operation_id,
+            created_at=datetime.utcnow(),
+            response=body.decode(),
+        )
+        .on_conflict_do_nothing(index_elements=[SyncOperation.user_id, SyncOperation.operation_id])
+    )
+    await db.commit()
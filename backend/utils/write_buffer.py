@@ -0,0 +1,92 @@
+"""Group commit for single-log writes from concurrent requests.
+
+Each POST /logs/ or PUT /logs/{date} normally commits on its own, and on
+SQLite every commit is a separate fsync under the database-wide write lock.
+With ``WRITE_COALESCE_MS`` set, the routers hand their write to a
+``GroupCommitBuffer`` instead. It collects the writes that arrive within that
+window (up to ``WRITE_COALESCE_MAX_BATCH``), runs them one after another in a
+single session and commits once. Only one batch is in flight at a time, so
+writes arriving during a commit form the next batch.
+
+Each caller still gets its own result or exception: if the shared transaction
+fails, the batch is rolled back and every write is retried in a transaction
+of its own.
+"""
+
+import asyncio
+import contextvars
+import logging
+from typing import Any, Awaitable, Callable
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Writes run inside the shared transaction; they must not commit themselves
+Write = Callable[..., Awaitable[Any]]
+
+
+class GroupCommitBuffer:
+    """Batches calls of ``write(db, *args)`` into shared transactions from ``session_factory``."""
+
+    def __init__(
+        self, session_factory: async_sessionmaker, write: Write, delay_seconds: float, max_batch: int
+    ):
+        self.session_factory = session_factory
+        self.write = write
+        self.delay_seconds = delay_seconds
+        self.max_batch = max_batch
+        self._pending: list[tuple[tuple, asyncio.Future]] = []
+        self._timer = None
+        self._flushing = False
+
+    async def submit(self, *args) -> Any:
+        """Queue ``write(db, *args)`` for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((args, future))
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None and not self._flushing:
+            # A fresh context keeps the batch's queries out of this request's metrics
+            self._timer = loop.call_later(
+                self.delay_seconds, self._start_flush, context=contextvars.Context()
+            )
+        return await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flushing or not self._pending:
+            return
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        self._flushing = True
+        asyncio.create_task(self._run(batch), context=contextvars.Context())
+
+    async def _run(self, batch: list[tuple[tuple, asyncio.Future]]) -> None:
+        try:
+            await self._flush(batch)
+        finally:
+            self._flushing = False
+            # Writes that queued up during the commit have already waited long enough
+            self._start_flush()
+
+    async def _flush(self, batch: list[tuple[tuple, asyncio.Future]]) -> None:
+        try:
+            async with self.session_factory() as db:
+                results = [await self.write(db, *args) for args, _ in batch]
+                await db.commit()
+        except Exception as e:
+            if len(batch) == 1:
+                _, future = batch[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            logger.warning(f"Group commit of {len(batch)} writes failed ({e}); retrying each alone.")
+            for item in batch:
+                await self._flush([item])
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
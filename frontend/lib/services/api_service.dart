@@ -9,9 +9,14 @@ class ApiService {
   final String baseUrl;
   String? _authToken;
 
+  /// Last 200 response for each ETag-guarded URL, keyed by URL. The server
+  /// answers a matching `If-None-Match` with an empty 304.
+  final Map<String, http.Response> _etagCache = {};
+
   ApiService({String? baseUrl}) : baseUrl = baseUrl ?? ApiConstants.baseUrl;
 
   void setAuthToken(String token) {
+    if (token != _authToken) _etagCache.clear();
     _authToken = token;
   }
 
@@ -23,6 +28,27 @@ class ApiService {
     return h;
   }
 
+  /// GET [uri], revalidating a cached copy with `If-None-Match`. On a 304
+  /// the cached 200 response is returned instead.
+  Future<http.Response> _getRevalidated(Uri uri) async {
+    final key = uri.toString();
+    final cached = _etagCache[key];
+    final etag = cached?.headers['etag'];
+    final response = await http.get(
+      uri,
+      headers: {..._headers, if (etag != null) 'If-None-Match': etag},
+    );
+    if (response.statusCode == 304 && cached != null) {
+      return cached;
+    }
+    if (response.statusCode == 200 && response.headers.containsKey('etag')) {
+      _etagCache[key] = response;
+    } else {
+      _etagCache.remove(key);
+    }
+    return response;
+  }
+
   // ─── Auth ──────────────────────────────────────────────────────────
 
   Future<AppUser> googleLogin(String idToken) async {
@@ -94,9 +120,8 @@ class ApiService {
         '${start.year}-${start.month.toString().padLeft(2, '0')}-${start.day.toString().padLeft(2, '0')}';
     final endStr =
         '${end.year}-${end.month.toString().padLeft(2, '0')}-${end.day.toString().padLeft(2, '0')}';
-    final response = await http.get(
+    final response = await _getRevalidated(
       Uri.parse('$baseUrl/logs/range/?start=$startStr&end=$endStr'),
-      headers: _headers,
     );
     if (response.statusCode == 200) {
       final List<dynamic> data = jsonDecode(response.body);
@@ -105,11 +130,16 @@ class ApiService {
     throw Exception('Get logs range failed: ${response.body}');
   }
 
-  Future<List<PrayerLog>> batchSync(List<PrayerLog> logs) async {
+  /// Pass the same [operationId] when retrying a batch; the server then
+  /// replays its first response instead of applying the batch again.
+  Future<List<PrayerLog>> batchSync(List<PrayerLog> logs, {String? operationId}) async {
     final response = await http.post(
       Uri.parse('$baseUrl/logs/sync'),
       headers: _headers,
-      body: jsonEncode({'logs': logs.map((l) => l.toJson()).toList()}),
+      body: jsonEncode({
+        'logs': logs.map((l) => l.toJson()).toList(),
+        if (operationId != null) 'operation_id': operationId,
+      }),
     );
     if (response.statusCode == 200) {
       final data = jsonDecode(response.body);
@@ -126,9 +156,11 @@ class ApiService {
       Uri.parse('$baseUrl/auth/account'),
       headers: _headers,
     );
-    if (response.statusCode != 204) {
+    // 202: the server finishes deleting in the background
+    if (response.statusCode != 204 && response.statusCode != 202) {
       throw Exception('Delete account failed: ${response.body}');
     }
+    _etagCache.clear();
   }
 
   // ─── Performance ──────────────────────────────────────────────────
@@ -141,13 +173,51 @@ class ApiService {
         '${start.year}-${start.month.toString().padLeft(2, '0')}-${start.day.toString().padLeft(2, '0')}';
     final endStr =
         '${end.year}-${end.month.toString().padLeft(2, '0')}-${end.day.toString().padLeft(2, '0')}';
-    final response = await http.get(
+    final response = await _getRevalidated(
       Uri.parse('$baseUrl/performance/?start=$startStr&end=$endStr'),
-      headers: _headers,
     );
     if (response.statusCode == 200) {
       return jsonDecode(response.body);
     }
     throw Exception('Get performance failed: ${response.body}');
   }
+
+  /// Performance per `day`, `week` or `month` bucket between [start] and [end],
+  /// in one request. Each bucket has the same fields as [getPerformance].
+  Future<List<Map<String, dynamic>>> getPerformanceSeries(
+    DateTime start,
+    DateTime end, {
+    String bucket = 'week',
+  }) async {
+    final startStr =
+        '${start.year}-${start.month.toString().padLeft(2, '0')}-${start.day.toString().padLeft(2, '0')}';
+    final endStr =
+        '${end.year}-${end.month.toString().padLeft(2, '0')}-${end.day.toString().padLeft(2, '0')}';
+    final response = await _getRevalidated(Uri.parse(
+        '$baseUrl/performance/series?start=$startStr&end=$endStr&bucket=$bucket'));
+    if (response.statusCode == 200) {
+      final data = jsonDecode(response.body);
+      return List<Map<String, dynamic>>.from(data['buckets']);
+    }
+    throw Exception('Get performance series failed: ${response.body}');
+  }
+
+  /// Per-prayer fardh completion rate and average sunnah/nafl/witr rakats
+  /// between [start] and [end], plus the most missed prayer.
+  Future<Map<String, dynamic>> getPerformanceBreakdown(
+    DateTime start,
+    DateTime end,
+  ) async {
+    final startStr =
+        '${start.year}-${start.month.toString().padLeft(2, '0')}-${start.day.toString().padLeft(2, '0')}';
+    final endStr =
+        '${end.year}-${end.month.toString().padLeft(2, '0')}-${end.day.toString().padLeft(2, '0')}';
+    final response = await _getRevalidated(
+      Uri.parse('$baseUrl/performance/breakdown?start=$startStr&end=$endStr'),
+    );
+    if (response.statusCode == 200) {
+      return jsonDecode(response.body);
+    }
+    throw Exception('Get performance breakdown failed: ${response.body}');
+  }
 }